@@ -0,0 +1,255 @@
+"""
+Параллельный запуск тестов YaNews и YaNote.
+
+Тесты каждого проекта делятся на шарды, и шарды обоих проектов
+выполняются одновременно в отдельных процессах pytest, не больше --jobs
+за раз. Каждый процесс работает со своим модулем настроек и своей
+тестовой базой SQLite в памяти. Результаты шардов сводятся в один отчёт
+со временем каждого теста.
+
+Запуск из корня репозитория:
+    python run_tests.py                       # --jobs по числу ядер
+    python run_tests.py --jobs 8 -o report.json
+    python run_tests.py --timings report.json  # шарды по прошлым временам
+"""
+import argparse
+import heapq
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+PROJECTS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+PYTEST = [
+    sys.executable, '-m', 'pytest', '-p', 'no:cacheprovider',
+    '-o', 'addopts=', '-o', 'junit_family=xunit1', '-q',
+]
+
+
+def pytest_env(project):
+    return {**os.environ, 'DJANGO_SETTINGS_MODULE': PROJECTS[project]}
+
+
+def collect(project):
+    """Идентификаторы тестов проекта из его testpaths."""
+    result = subprocess.run(
+        [*PYTEST, '--collect-only'], cwd=BASE_DIR / project,
+        env=pytest_env(project), capture_output=True, text=True
+    )
+    if result.returncode:
+        sys.exit(f'{project}: не удалось собрать тесты\n{result.stdout}')
+    return [line for line in result.stdout.splitlines() if '::' in line]
+
+
+def group_of(node_id):
+    """
+    Тесты одного класса идут в один шард.
+
+    Так setUpTestData класса выполняется один раз, а не в каждом шарде.
+    """
+    path, *names = node_id.split('::')
+    return '::'.join([path, *names[:-1]]) if len(names) > 1 else node_id
+
+
+def shard(node_ids, shards, timings):
+    """
+    Раскладываем группы тестов по шардам жадно, начиная с самых долгих.
+
+    timings — время тестов из прошлого отчёта; неизвестные тесты
+    считаются средними.
+    """
+    groups = {}
+    for node_id in node_ids:
+        groups.setdefault(group_of(node_id), []).append(node_id)
+    default = (sum(timings.values()) / len(timings)) if timings else 1
+    weights = {
+        group: sum(timings.get(node_id, default) for node_id in members)
+        for group, members in groups.items()
+    }
+    heap = [(0, number, []) for number in range(min(shards, len(groups)))]
+    for group in sorted(groups, key=weights.get, reverse=True):
+        weight, number, members = heapq.heappop(heap)
+        members.extend(groups[group])
+        heapq.heappush(heap, (weight + weights[group], number, members))
+    return sorted(
+        ((weight, members) for weight, _, members in heap), reverse=True
+    )
+
+
+def node_id_of(case):
+    """Идентификатор pytest для теста из JUnit XML (формат xunit1)."""
+    path = case.get('file')
+    module = path[:-len('.py')].replace('/', '.')
+    names = [case.get('classname')[len(module) + 1:], case.get('name')]
+    return '::'.join([path, *filter(None, names)])
+
+
+def run_shard(project, number, node_ids, directory):
+    """
+    Запускаем шард и читаем результаты тестов из JUnit XML.
+
+    Пустой node_ids — все тесты проекта.
+    """
+    report = Path(directory) / f'{project}-{number}.xml'
+    started = time.perf_counter()
+    result = subprocess.run(
+        [*PYTEST, f'--junitxml={report}', *node_ids],
+        cwd=BASE_DIR / project, env=pytest_env(project),
+        capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    tests = []
+    if report.exists():
+        for case in ElementTree.parse(report).iter('testcase'):
+            problem = next(
+                (child for child in case
+                 if child.tag in ('failure', 'error', 'skipped')),
+                None
+            )
+            tests.append({
+                'project': project,
+                'test': node_id_of(case),
+                'time': float(case.get('time', 0)),
+                'outcome': 'passed' if problem is None else problem.tag,
+                'message': None if problem is None else problem.get(
+                    'message'
+                ),
+            })
+    return {
+        'project': project,
+        'shard': number,
+        'tests': tests,
+        'elapsed': round(elapsed, 3),
+        'returncode': result.returncode,
+        'output': result.stdout if result.returncode else '',
+    }
+
+
+def summarize(shards, elapsed):
+    tests = [test for result in shards for test in result['tests']]
+    projects = {}
+    for project in PROJECTS:
+        own = [test for test in tests if test['project'] == project]
+        outcomes = {}
+        for test in own:
+            outcomes[test['outcome']] = outcomes.get(test['outcome'], 0) + 1
+        projects[project] = {
+            'tests': len(own),
+            **outcomes,
+            'test_time': round(sum(test['time'] for test in own), 3),
+            'shards': [
+                result['elapsed'] for result in shards
+                if result['project'] == project
+            ],
+        }
+    return {
+        'elapsed': round(elapsed, 3),
+        'test_time': round(sum(test['time'] for test in tests), 3),
+        'projects': projects,
+        'tests': sorted(tests, key=lambda test: -test['time']),
+    }
+
+
+def print_report(report, shards, slowest):
+    for result in shards:
+        # Упавший процесс без упавших тестов: ошибка импорта, конфигурации.
+        if result['returncode'] and not any(
+            test['outcome'] in ('failure', 'error')
+            for test in result['tests']
+        ):
+            print(f'{result["project"]}, шард {result["shard"]}:')
+            print(result['output'])
+    for test in report['tests']:
+        if test['outcome'] in ('failure', 'error'):
+            print(f'{test["outcome"].upper()} {test["project"]}/'
+                  f'{test["test"]}: {test["message"]}')
+    print('\nСамые долгие тесты:')
+    for test in report['tests'][:slowest]:
+        print(f'{test["time"]:8.3f} с  {test["project"]}/{test["test"]}')
+    print()
+    for project, summary in report['projects'].items():
+        shard_times = ', '.join(f'{value:.1f}' for value in summary['shards'])
+        print(
+            f'{project}: тестов {summary["tests"]}, '
+            f'прошло {summary.get("passed", 0)}, '
+            f'упало {summary.get("failure", 0) + summary.get("error", 0)}, '
+            f'пропущено {summary.get("skipped", 0)}; '
+            f'шарды {shard_times} с'
+        )
+    print(
+        f'Время тестов {report["test_time"]:.1f} с, '
+        f'по часам {report["elapsed"]:.1f} с'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='одновременных процессов pytest')
+    parser.add_argument('--shards', type=int,
+                        help='шардов на проект, по умолчанию --jobs')
+    parser.add_argument('--timings', type=Path,
+                        help='прошлый JSON-отчёт для раскладки по шардам')
+    parser.add_argument('--slowest', type=int, default=10)
+    parser.add_argument('-o', '--output', type=Path,
+                        help='файл для JSON-отчёта')
+    args = parser.parse_args()
+
+    timings = {}
+    if args.timings and args.timings.exists():
+        for test in json.loads(args.timings.read_text())['tests']:
+            timings[test['project'], test['test']] = test['time']
+
+    started = time.perf_counter()
+    shards = args.shards or args.jobs
+    jobs = []
+    if shards == 1:
+        # Один шард на проект: собирать список тестов заранее незачем.
+        for project in PROJECTS:
+            weight = sum(
+                value for (owner, _), value in timings.items()
+                if owner == project
+            )
+            jobs.append((weight, project, 0, []))
+    else:
+        with ThreadPoolExecutor(max_workers=len(PROJECTS)) as executor:
+            collected = zip(PROJECTS, executor.map(collect, PROJECTS))
+        for project, node_ids in collected:
+            known = {
+                node_id: timings[project, node_id]
+                for node_id in node_ids if (project, node_id) in timings
+            }
+            for number, (weight, members) in enumerate(
+                shard(node_ids, shards, known)
+            ):
+                jobs.append((weight, project, number, members))
+    # Сначала самые долгие шарды, чтобы в конце не ждать одного из них.
+    jobs.sort(key=lambda job: -job[0])
+    with tempfile.TemporaryDirectory() as directory, \
+            ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        shards = list(executor.map(
+            lambda job: run_shard(*job[1:], directory), jobs
+        ))
+    report = summarize(shards, time.perf_counter() - started)
+    print_report(report, shards, args.slowest)
+    if args.output:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2) + '\n'
+        )
+    sys.exit(1 if any(result['returncode'] for result in shards) else 0)
+
+
+if __name__ == '__main__':
+    main()
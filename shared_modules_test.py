@@ -0,0 +1,75 @@
+"""
+Общие модули YaNews и YaNote не должны расходиться.
+
+Проекты запускаются отдельно, поэтому инфраструктурные модули лежат
+в каждом из них. Копии сравниваются после замены имён проекта
+и приложения; правка одной копии без другой роняет проверку.
+"""
+import difflib
+import re
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+PROJECT_NAMES = (
+    (r'\byanews\b', 'yanote'),
+    (r'\bYaNews\b', 'YaNote'),
+    (r'\bya_news\b', 'ya_note'),
+    (r'\bnews\b', 'notes'),
+)
+SHARED_MODULES = (
+    'benchmarks/load.py',
+    'benchmarks/utils.py',
+    'gunicorn.conf.py',
+    'news/management/commands/compile_templates.py',
+    'news/management/commands/profile_report.py',
+    'news/pagination.py',
+    'news/streaming.py',
+    'news/zipstream.py',
+    'yanews/asgi.py',
+    'yanews/backends/cache.py',
+    'yanews/backends/sqlite3/base.py',
+    'yanews/metrics.py',
+    'yanews/profiling.py',
+    'yanews/query_budget.py',
+    'yanews/query_plans.py',
+    'yanews/server_timing.py',
+    'yanews/template_cache.py',
+    'yanews/wsgi.py',
+)
+
+
+def normalize(text):
+    for pattern, name in PROJECT_NAMES:
+        text = re.sub(pattern, name, text)
+    return text
+
+
+def note_path(path):
+    """Путь копии в YaNote: yanews/ и news/ меняются на yanote/ и notes/."""
+    top, _, rest = path.partition('/')
+    return '/'.join(filter(None, (normalize(top), rest)))
+
+
+errors = []
+for path in SHARED_MODULES:
+    news_file = BASE_DIR / 'ya_news' / path
+    note_file = BASE_DIR / 'ya_note' / note_path(path)
+    missing = [str(file.relative_to(BASE_DIR))
+               for file in (news_file, note_file) if not file.is_file()]
+    if missing:
+        errors.append(f'\nНет общего модуля: {", ".join(missing)}')
+        continue
+    diff = ''.join(difflib.unified_diff(
+        normalize(news_file.read_text()).splitlines(keepends=True),
+        note_file.read_text().splitlines(keepends=True),
+        str(news_file.relative_to(BASE_DIR)),
+        str(note_file.relative_to(BASE_DIR)),
+    ))
+    if diff:
+        errors.append(
+            '\nКопии общего модуля разошлись, перенесите правку в обе:\n'
+            + diff
+        )
+
+assert not errors, ''.join(errors)
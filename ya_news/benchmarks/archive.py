@@ -0,0 +1,77 @@
+"""
+Сравнение постраничного вывода архива по курсору и через OFFSET.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.archive --rows 1000000 --page 10000
+"""
+import argparse
+from datetime import date, timedelta
+
+from .utils import measure, setup_django
+
+BATCH_SIZE = 10_000
+NEWS_PER_DAY = 10
+
+
+def fill_news(rows):
+    from news.models import News
+
+    today = date.today()
+    for start in range(0, rows, BATCH_SIZE):
+        News.objects.bulk_create(
+            News(
+                title=f'Новость {index}',
+                text='Просто текст.',
+                date=today - timedelta(days=index // NEWS_PER_DAY),
+            )
+            for index in range(start, min(start + BATCH_SIZE, rows))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--page', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    from news.models import News
+    from news.pagination import KeysetPaginator
+    from news.views import NewsList
+
+    fill_news(args.rows)
+    per_page = settings.NEWS_COUNT_ON_HOME_PAGE
+    queryset = News.objects.all()
+    paginator = KeysetPaginator(
+        queryset, NewsList.archive_ordering, per_page
+    )
+    offset = (args.page - 1) * per_page
+    # У первой страницы нет предыдущей: она открывается без курсора.
+    deep_cursor = None
+    if offset:
+        deep_cursor = paginator.encode_cursor(paginator.queryset[offset - 1])
+    ordered = queryset.order_by(*NewsList.archive_ordering)
+
+    results = (
+        ('курсор, страница 1', lambda: paginator.page()),
+        (
+            f'курсор, страница {args.page}',
+            lambda: paginator.page(deep_cursor),
+        ),
+        ('OFFSET, страница 1', lambda: list(ordered[:per_page])),
+        (
+            f'OFFSET, страница {args.page}',
+            lambda: list(ordered[offset:offset + per_page]),
+        ),
+    )
+    print(f'Новостей в базе: {args.rows}')
+    for name, func in results:
+        elapsed = measure(func, repeat=args.repeat)
+        print(f'{name:<30} {elapsed * 1000:8.3f} мс')
+
+
+if __name__ == '__main__':
+    main()
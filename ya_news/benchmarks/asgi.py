@@ -0,0 +1,194 @@
+"""
+Пропускная способность главной и страницы новости под WSGI и ASGI.
+
+Приложения вызываются в процессе, без сетевого сервера: WSGI — из пула
+потоков, ASGI — из одновременных корутин в одном цикле событий.
+Под ASGI сравниваются синхронные представления (Django выполняет их
+в одном общем потоке) и асинхронные с пулом ASYNC_ORM_THREADS.
+
+SQLite в процессе отвечает без ожидания, и рендеринг упирается в GIL,
+поэтому --query-latency добавляет к каждому запросу задержку сетевой
+базы: именно её потоки пула и перекрывают.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.asgi --clients 32 --requests 50 --query-latency 2
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .utils import setup_django
+
+
+def fill_news(count, comments):
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+
+    author = get_user_model().objects.create(username='Автор')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Просто текст. ' * 20)
+        for index in range(count)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in News.objects.all()
+        for index in range(comments)
+    )
+    return [
+        f'/news/{pk}/' for pk in News.objects.values_list('pk', flat=True)
+    ]
+
+
+def add_query_latency(seconds):
+    """Каждый SQL-запрос ждёт, как при обращении к базе по сети."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def wait(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(connection, **kwargs):
+        # В начало списка: соединение может открыться внутри блока
+        # execute_wrapper, который при выходе снимает последнюю обёртку.
+        if wait not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, wait)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        install(connection)
+
+
+def client_paths(paths, client, requests):
+    """Чередуем главную и страницы новостей."""
+    return [
+        '/' if index % 2 else paths[(client + index) % len(paths)]
+        for index in range(requests)
+    ]
+
+
+def run_wsgi(application, paths, clients, requests):
+    from django.test import RequestFactory
+
+    factory = RequestFactory(SERVER_NAME='localhost')
+
+    def client(number):
+        timings = []
+        for path in client_paths(paths, number, requests):
+            started = time.perf_counter()
+            environ = factory._base_environ(PATH_INFO=path)
+            response = application(environ, lambda status, headers: None)
+            b''.join(response)
+            response.close()
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        return [
+            timing
+            for timings in executor.map(client, range(clients))
+            for timing in timings
+        ]
+
+
+async def asgi_request(application, path):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        pass
+
+    await application(scope, receive, send)
+
+
+async def run_asgi(application, paths, clients, requests):
+    async def client(number):
+        timings = []
+        for path in client_paths(paths, number, requests):
+            started = time.perf_counter()
+            await asgi_request(application, path)
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    results = await asyncio.gather(*(client(n) for n in range(clients)))
+    return [timing for timings in results for timing in timings]
+
+
+def report(label, timings, elapsed):
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95)]
+    print(
+        f'{label:<22} {len(timings) / elapsed:8.0f} запросов/с, '
+        f'медиана {statistics.median(timings) * 1000:7.2f} мс, '
+        f'p95 {p95 * 1000:7.2f} мс'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--news', type=int, default=100)
+    parser.add_argument('--comments', type=int, default=20)
+    parser.add_argument(
+        '--query-latency', type=float, default=0,
+        help='задержка каждого SQL-запроса, мс'
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'db.sqlite3')
+        from django.conf import settings
+        from django.core.handlers.asgi import ASGIHandler
+        from django.core.handlers.wsgi import WSGIHandler
+
+        paths = fill_news(args.news, args.comments)
+        if args.query_latency:
+            add_query_latency(args.query_latency / 1000)
+        asgi_urlconf = settings.ASGI_URLCONF
+        modes = (
+            ('WSGI, потоки', WSGIHandler(), None),
+            ('ASGI, sync-views', ASGIHandler(), None),
+            ('ASGI, async-views', ASGIHandler(), asgi_urlconf),
+        )
+        for label, application, urlconf in modes:
+            settings.ASGI_URLCONF = urlconf
+            if isinstance(application, WSGIHandler):
+                def run():
+                    return run_wsgi(
+                        application, paths, args.clients, args.requests
+                    )
+            else:
+                def run():
+                    return asyncio.run(run_asgi(
+                        application, paths, args.clients, args.requests
+                    ))
+            # Прогрев: кэш шаблонов, фрагментов и соединения потоков.
+            run()
+            started = time.perf_counter()
+            timings = run()
+            report(label, timings, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Потоковая загрузка и выгрузка: пропускная способность и пиковая память.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bulkload --rows 200000
+"""
+import argparse
+import gzip
+import json
+import resource
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from .utils import setup_django
+
+
+def peak_memory_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_news(path, rows):
+    with gzip.open(path, 'wt', encoding='utf-8') as stream:
+        for index in range(rows):
+            stream.write(json.dumps({
+                'model': 'news.news',
+                'fields': {
+                    'title': f'Новость {index}',
+                    'text': 'Просто текст. ' * 20,
+                    'date': '2022-11-01',
+                },
+            }, ensure_ascii=False) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'db.sqlite3')
+        from django.core.management import call_command
+
+        source = Path(directory) / 'news.jsonl.gz'
+        write_news(source, args.rows)
+        print(f'Файл: {source.stat().st_size / 2 ** 20:.1f} МБ (gzip)')
+        print(f'Память до загрузки: {peak_memory_mb():.0f} МБ')
+        started = time.perf_counter()
+        call_command(
+            'bulkload', str(source),
+            batch_size=args.batch_size, stdout=StringIO()
+        )
+        elapsed = time.perf_counter() - started
+        print(
+            f'Загрузка: {args.rows / elapsed:.0f} объектов/с, '
+            f'пик памяти {peak_memory_mb():.0f} МБ'
+        )
+        started = time.perf_counter()
+        call_command(
+            'bulkdump', 'news.News',
+            output=str(Path(directory) / 'dump.jsonl.gz'), stderr=StringIO()
+        )
+        elapsed = time.perf_counter() - started
+        print(
+            f'Выгрузка: {args.rows / elapsed:.0f} объектов/с, '
+            f'пик памяти {peak_memory_mb():.0f} МБ'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Общая часть нагрузочного теста: транспорт, виртуальные пользователи,
+исполнители в потоках или процессах и отчёт по именам маршрутов.
+"""
+import http.client
+import math
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+
+HOST = 'localhost'
+
+
+class InProcessTransport:
+    """Вызываем WSGI-приложение напрямую, без сети."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def send(self, method, path, body, headers):
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_HOST': HOST,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers.items():
+            key = name.upper().replace('-', '_')
+            environ[key if key == 'CONTENT_TYPE' else f'HTTP_{key}'] = value
+        started = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            started['status'] = int(status.split()[0])
+            started['headers'] = response_headers
+
+        result = self.application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers'], content
+
+
+class HTTPTransport:
+    """Отправляем запросы серверу на локальном порту."""
+
+    def __init__(self, port):
+        self.port = port
+
+    def send(self, method, path, body, headers):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        try:
+            connection.request(
+                method, path, body=body,
+                headers={'Host': f'{HOST}:{self.port}', **headers}
+            )
+            response = connection.getresponse()
+            return response.status, response.getheaders(), response.read()
+        finally:
+            connection.close()
+
+
+def serve(application):
+    """Запускаем приложение на свободном порту в фоновом потоке."""
+    from django.core.servers.basehttp import (
+        ThreadedWSGIServer, WSGIRequestHandler
+    )
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+    server.set_app(application)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Client:
+    """
+    Виртуальный пользователь.
+
+    Хранит cookie, отправляет CSRF-токен в POST-запросах и записывает
+    для каждого запроса имя маршрута, время ответа и код статуса.
+    """
+
+    def __init__(self, transport, samples, cookies=None, user=None):
+        self.transport = transport
+        self.samples = samples
+        self.cookies = dict(cookies or {})
+        self.user = user
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def post(self, path, data=None):
+        return self.request('POST', path, data or {})
+
+    def request(self, method, path, data=None):
+        from django.urls import resolve
+
+        headers, body = {}, b''
+        if data is not None:
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            if 'csrftoken' in self.cookies:
+                headers['X-CSRFToken'] = self.cookies['csrftoken']
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            )
+        started = time.perf_counter()
+        status, response_headers, content = self.transport.send(
+            method, path, body, headers
+        )
+        elapsed = time.perf_counter() - started
+        for name, value in response_headers:
+            if name.lower() == 'set-cookie':
+                for key, morsel in SimpleCookie(value).items():
+                    self.cookies[key] = morsel.value
+        view_name = resolve(urlsplit(path).path).view_name
+        self.samples.append((view_name, elapsed, status))
+        return status, content
+
+
+def run_worker(number, scenarios, make_transport, data, duration, seed):
+    """Один исполнитель: повторяет свой сценарий до конца времени."""
+    _, (scenario, logged_in) = scenarios[number % len(scenarios)]
+    sessions = data['sessions']
+    user = number % len(sessions) if logged_in else None
+    cookies = {data['session_cookie']: sessions[user]} if logged_in else {}
+    samples = []
+    client = Client(make_transport(), samples, cookies, user)
+    rng = random.Random(seed + number)
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        scenario(client, data, rng)
+    return samples
+
+
+def run_load(scenarios, make_transport, data, workers, duration,
+             processes=False, seed=0):
+    """
+    Запускаем workers исполнителей в потоках или процессах.
+
+    scenarios — список пар (имя, (функция, нужен ли вход)); исполнители
+    получают сценарии по кругу. Возвращаем замеры и общее время.
+    """
+    from django.db import connections
+
+    arguments = [
+        (number, scenarios, make_transport, data, duration, seed)
+        for number in range(workers)
+    ]
+    started = time.monotonic()
+    if processes:
+        # Дочерние процессы открывают свои соединения с базой.
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            results = pool.starmap(run_worker, arguments)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda args: run_worker(*args), arguments
+            ))
+    elapsed = time.monotonic() - started
+    return [sample for samples in results for sample in samples], elapsed
+
+
+def percentile(values, share):
+    """Процентиль по ближайшему рангу для отсортированного списка."""
+    return values[max(0, math.ceil(share * len(values)) - 1)]
+
+
+def summarize(samples, elapsed):
+    """Пропускная способность и задержки по именам маршрутов."""
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for view_name, latency, status in samples:
+        latencies[view_name].append(latency)
+        if status >= 400:
+            errors[view_name] += 1
+    urls = {}
+    for view_name, values in sorted(latencies.items()):
+        values.sort()
+        urls[view_name] = {
+            'requests': len(values),
+            'errors': errors[view_name],
+            'throughput': round(len(values) / elapsed, 2),
+        }
+        for share in (50, 95, 99):
+            latency = percentile(values, share / 100)
+            urls[view_name][f'p{share}_ms'] = round(latency * 1000, 3)
+    return {
+        'requests': len(samples),
+        'errors': sum(errors.values()),
+        'throughput': round(len(samples) / elapsed, 2),
+        'elapsed': round(elapsed, 3),
+        'urls': urls,
+    }
@@ -0,0 +1,152 @@
+"""
+Нагрузочный тест YaNews: задержки p50/p95/p99 по именам маршрутов в JSON.
+
+Приложение yanews.wsgi работает в процессе или на локальном порту
+(--port-mode) с синтетическими данными во временной базе.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.loadtest --workers 8 --duration 10 -o load.json
+    python -m benchmarks.loadtest --scenarios browse --workers 4 --processes
+"""
+import argparse
+import json
+import sys
+import tempfile
+from functools import partial
+from importlib import import_module
+from pathlib import Path
+
+from .load import HTTPTransport, InProcessTransport, run_load, serve, summarize
+from .utils import setup_django
+
+
+def browse(client, data, rng):
+    """Аноним смотрит главную, архив, новость и её комментарии."""
+    from django.urls import reverse
+
+    news_id = rng.choice(data['news'])
+    client.get(reverse('news:home'))
+    client.get(reverse('news:archive'))
+    client.get(reverse('news:detail', args=(news_id,)))
+    client.get(reverse('news:comments', args=(news_id,)))
+
+
+def comment(client, data, rng):
+    """Пользователь открывает новость, пишет комментарий и видит его."""
+    from django.urls import reverse
+
+    url = reverse('news:detail', args=(rng.choice(data['news']),))
+    client.get(url)
+    client.post(url, {'text': 'Комментарий под нагрузкой'})
+    client.get(url)
+
+
+SCENARIOS = {
+    'browse': (browse, False),
+    'comment': (comment, True),
+}
+
+
+def seed(news_count, comments_per_news, users):
+    """Заполняем базу и заранее создаём сессии пользователей."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model, login
+    from django.http import HttpRequest
+
+    from news.management.commands.recount_comments import recount_comments
+    from news.models import Comment, News
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{index}') for index in range(users)
+    )
+    authors = list(User.objects.order_by('pk'))
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Просто текст. ' * 20)
+        for index in range(news_count)
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                news_id=news_id, author=authors[index % users],
+                text=f'Комментарий {index}'
+            )
+            for news_id in news_ids
+            for index in range(comments_per_news)
+        ),
+        batch_size=5000
+    )
+    recount_comments()
+    engine = import_module(settings.SESSION_ENGINE)
+    sessions = []
+    for author in authors:
+        request = HttpRequest()
+        request.session = engine.SessionStore()
+        login(request, author, 'django.contrib.auth.backends.ModelBackend')
+        request.session.save()
+        sessions.append(request.session.session_key)
+    return {
+        'news': news_ids,
+        'sessions': sessions,
+        'session_cookie': settings.SESSION_COOKIE_NAME,
+    }
+
+
+def make_transport(port=None):
+    if port is not None:
+        return HTTPTransport(port)
+    from yanews.wsgi import application
+    return InProcessTransport(application)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--processes', action='store_true',
+                        help='исполнители в процессах, а не в потоках')
+    parser.add_argument('--port-mode', action='store_true',
+                        help='запросы по HTTP к серверу на локальном порту')
+    parser.add_argument('--news', type=int, default=500)
+    parser.add_argument('--comments', type=int, default=20)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='файл для JSON-отчёта')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'db.sqlite3')
+        data = seed(args.news, args.comments, args.users)
+        port = None
+        if args.port_mode:
+            from yanews.wsgi import application
+            port = serve(application).server_address[1]
+        samples, elapsed = run_load(
+            [(name, SCENARIOS[name]) for name in args.scenarios],
+            partial(make_transport, port), data,
+            args.workers, args.duration, args.processes, args.seed
+        )
+    report = {
+        'app': 'ya_news',
+        'transport': 'http' if args.port_mode else 'in-process',
+        'executor': 'processes' if args.processes else 'threads',
+        'workers': args.workers,
+        'duration': args.duration,
+        'scenarios': args.scenarios,
+        **summarize(samples, elapsed),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
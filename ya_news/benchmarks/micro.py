@@ -0,0 +1,87 @@
+"""
+Микробенчмарки горячих функций YaNews с проверкой по базовой линии.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.micro                    # сравнить с baseline.json
+    python -m benchmarks.micro --threshold 0.1 -o micro.json
+    python -m benchmarks.micro --update-baseline  # записать новую линию
+"""
+from .templates import view_context
+from .utils import run_micro
+
+TEXT = (
+    'Отличная новость, спасибо автору! Хотелось бы подробнее узнать, '
+    'что будет дальше и как это скажется на жителях района. '
+) * 3
+
+CASES = {}
+
+
+def case(number):
+    """Регистрируем подготовку случая и число вызовов в повторении."""
+    def register(setup):
+        CASES[setup.__name__] = (setup, number)
+        return setup
+    return register
+
+
+def comment_form(text):
+    from news.forms import CommentForm
+
+    form = CommentForm()
+    form.cleaned_data = {'text': text}
+    return form
+
+
+@case(number=500)
+def clean_text():
+    return comment_form(TEXT).clean_text
+
+
+@case(number=50)
+def clean_text_long():
+    return comment_form(TEXT * 20).clean_text
+
+
+def home_page():
+    """Шаблон, контекст и запрос главной с полной страницей новостей."""
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.template.loader import get_template
+    from django.test import RequestFactory
+
+    from news.models import News
+    from news.views import NewsList
+
+    if not News.objects.exists():
+        News.objects.bulk_create(
+            News(title=f'Новость {index}', text=TEXT)
+            for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+        )
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    name, context = view_context(NewsList, request)
+    return get_template(name), context, request
+
+
+@case(number=20)
+def render_home():
+    from django.core.cache import cache
+
+    template, context, request = home_page()
+
+    def render():
+        # Без кэша фрагментов: рендерится каждая новость.
+        cache.clear()
+        template.render(context, request)
+    return render
+
+
+@case(number=100)
+def render_home_cached():
+    template, context, request = home_page()
+    return lambda: template.render(context, request)
+
+
+if __name__ == '__main__':
+    run_micro(CASES, __doc__)
@@ -0,0 +1,56 @@
+"""
+Проверка комментария на запрещённые слова: перебор словаря и автомат.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.profanity --words 10000
+"""
+import argparse
+import random
+
+from .utils import measure, setup_django
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def naive_search(words, text):
+    lowered_text = text.lower()
+    return any(word in lowered_text for word in words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from news.profanity import WordMatcher
+
+    rng = random.Random(0)
+    print(f'Слов в словаре: {args.words}')
+    for size in (100, args.words // 10, args.words):
+        words = [random_word(rng, rng.randint(5, 10)) for _ in range(size)]
+        matcher = WordMatcher(words)
+        for length in (100, 1000, 10_000):
+            text = ' '.join(
+                random_word(rng, 7) for _ in range(length // 8)
+            )
+            naive = measure(
+                lambda: naive_search(words, text), repeat=args.repeat
+            )
+            automaton = measure(
+                lambda: matcher.search(text), repeat=args.repeat
+            )
+            print(
+                f'словарь {size:>6}, текст {len(text):>6}: '
+                f'перебор {naive * 1000:8.3f} мс, '
+                f'автомат {automaton * 1000:8.3f} мс'
+            )
+
+
+if __name__ == '__main__':
+    main()
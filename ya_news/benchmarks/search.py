@@ -0,0 +1,68 @@
+"""
+Поиск по новостям: FTS5 против icontains на синтетическом корпусе.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.search --rows 200000
+"""
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from .utils import measure, setup_django
+
+BATCH_SIZE = 10_000
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--words', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'db.sqlite3')
+        from django.conf import settings
+        from django.db.models import Q
+
+        from news.models import News
+        from news.search import SearchResults
+
+        rng = random.Random(0)
+        vocabulary = [
+            ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 10)))
+            for _ in range(args.words)
+        ]
+        for start in range(0, args.rows, BATCH_SIZE):
+            News.objects.bulk_create(
+                News(
+                    title=' '.join(rng.choices(vocabulary, k=4)),
+                    text=' '.join(rng.choices(vocabulary, k=60)),
+                )
+                for _ in range(start, min(start + BATCH_SIZE, args.rows))
+            )
+        per_page = settings.NEWS_COUNT_ON_HOME_PAGE
+        word = rng.choice(vocabulary)
+
+        def fts():
+            results = SearchResults(word)
+            results.count()
+            return results[0:per_page]
+
+        def icontains():
+            queryset = News.objects.filter(
+                Q(title__icontains=word) | Q(text__icontains=word)
+            )
+            queryset.count()
+            return list(queryset[:per_page])
+
+        print(f'Новостей: {args.rows}, слово: {word}')
+        for name, func in (('FTS5', fts), ('icontains', icontains)):
+            elapsed = measure(func, repeat=args.repeat, warmup=1)
+            print(f'{name:<10} {elapsed * 1000:10.3f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Смешанная нагрузка чтения и записи из нескольких потоков на файловой SQLite.
+
+Сравнивает настройки по умолчанию (журнал отката, новое соединение
+на каждую операцию, как при CONN_MAX_AGE = 0) с WAL, PRAGMA
+из settings.SQLITE_PRAGMAS и постоянными соединениями.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.sqlite_concurrency --threads 8 --seconds 5
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    import django
+    from django.conf import settings
+    django.setup()
+    settings.DEBUG = False
+
+
+def prepare(path, pragmas, news_count):
+    """Создаём базу в новом файле и заполняем новостями."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connection
+
+    from news.models import News
+
+    connection.close()
+    settings.SQLITE_PRAGMAS = pragmas
+    connection.settings_dict['NAME'] = str(path)
+    call_command('migrate', verbosity=0)
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Просто текст.')
+        for index in range(news_count)
+    )
+    connection.close()
+    return get_user_model().objects.create(username='reader')
+
+
+def worker(author, news_ids, write_ratio, deadline, reconnect, results):
+    from django.db import OperationalError, connection
+
+    from news.models import Comment, News
+
+    rng = random.Random()
+    timings, errors = [], 0
+    while time.perf_counter() < deadline:
+        news_id = rng.choice(news_ids)
+        started = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                Comment.objects.create(
+                    news_id=news_id, author=author, text='Комментарий'
+                )
+            else:
+                News.objects.get(pk=news_id)
+                list(Comment.objects.filter(news_id=news_id)[:50])
+        except OperationalError:
+            errors += 1
+        else:
+            timings.append(time.perf_counter() - started)
+        if reconnect:
+            connection.close()
+    connection.close()
+    results.append((timings, errors))
+
+
+def run(author, threads, seconds, write_ratio, reconnect):
+    from news.models import News
+
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    results = []
+    deadline = time.perf_counter() + seconds
+    pool = [
+        threading.Thread(target=worker, args=(
+            author, news_ids, write_ratio, deadline, reconnect, results
+        ))
+        for _ in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    timings = sorted(
+        timing for thread_timings, _ in results for timing in thread_timings
+    )
+    errors = sum(thread_errors for _, thread_errors in results)
+    return timings, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--news', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    modes = (
+        ('по умолчанию', {}, True),
+        ('WAL + PRAGMA', settings.SQLITE_PRAGMAS, False),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for number, (label, pragmas, reconnect) in enumerate(modes):
+            author = prepare(
+                Path(directory) / f'db{number}.sqlite3', pragmas, args.news
+            )
+            timings, errors = run(
+                author, args.threads, args.seconds,
+                args.write_ratio, reconnect
+            )
+            p95 = timings[int(len(timings) * 0.95)] if timings else 0
+            print(
+                f'{label:>14}: {len(timings) / args.seconds:8.0f} оп/с, '
+                f'медиана {statistics.median(timings or [0]) * 1000:.2f} мс, '
+                f'p95 {p95 * 1000:.2f} мс, «database is locked»: {errors}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Рендеринг шаблонов с кэширующим загрузчиком и без него.
+
+Контекст берётся из настоящих представлений, поэтому время включает
+и разбор шаблонов (без кэша), и сам рендеринг.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.templates --repeat 200
+"""
+import argparse
+
+from .utils import measure, setup_django
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+PROFILES = (
+    ('development', LOADERS),
+    ('production', [('django.template.loaders.cached.Loader', LOADERS)]),
+)
+
+
+def make_backend(loaders):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    config = settings.TEMPLATES[0]
+    return DjangoTemplates({
+        'NAME': 'benchmark',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {**config['OPTIONS'], 'loaders': loaders},
+    })
+
+
+def view_context(view, request, **kwargs):
+    """Имя шаблона и контекст ответа представления без рендеринга."""
+    response = view.as_view()(request, **kwargs)
+    return response.template_name[0], response.context_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--news', type=int, default=10)
+    parser.add_argument('--comments', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.test import RequestFactory
+
+    from news.models import Comment, News
+    from news.views import NewsDetail, NewsList
+
+    author = get_user_model().objects.create(username='Автор')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Просто текст. ' * 20)
+        for index in range(args.news)
+    )
+    news = News.objects.first()
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(args.comments)
+    )
+    request = RequestFactory().get('/')
+    request.user = author
+    pages = (
+        view_context(NewsList, request),
+        view_context(NewsDetail, request, pk=news.pk),
+    )
+    for profile, loaders in PROFILES:
+        backend = make_backend(loaders)
+        for name, context in pages:
+            def render():
+                # Кэш фрагментов главной иначе скрыл бы рендеринг новостей.
+                cache.clear()
+                backend.get_template(name).render(context, request)
+
+            elapsed = measure(render, repeat=args.repeat)
+            print(f'{profile:<12} {name:<18} {elapsed * 1000:8.3f} мс')
+
+
+if __name__ == '__main__':
+    main()
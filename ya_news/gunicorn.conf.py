@@ -0,0 +1,18 @@
+"""
+Настройки gunicorn, которые он читает из текущего каталога.
+
+Запуск из каталога проекта:
+    gunicorn yanews.wsgi --workers 4
+"""
+import os
+
+from django.conf import settings
+
+from yanews.metrics import clear
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+
+
+def on_starting(server):
+    """Мастер очищает метрики прошлого запуска до старта воркеров."""
+    clear(settings.METRICS_DIR)
@@ -0,0 +1,18 @@
+from django.urls import path
+
+from news import async_views, urls
+
+app_name = 'news'
+
+# Маршруты, которые под ASGI обслуживают асинхронные представления.
+ASYNC_VIEWS = {
+    'home': async_views.NewsList.as_view(),
+    'archive': async_views.NewsList.as_view(archive=True),
+    'detail': async_views.NewsDetailView.as_view(),
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in urls.urlpatterns
+]
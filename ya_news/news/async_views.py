@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from yanews.server_timing import template_timer
+
+from . import views
+
+# Ограниченный пул потоков для запросов к базе и рендеринга.
+# Без него Django 3.2 под ASGI выполняет все синхронные представления
+# в одном общем потоке, и запросы идут строго по очереди.
+ORM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_ORM_THREADS, thread_name_prefix='orm'
+)
+
+
+def rendered(view):
+    """Синхронное представление, которое сразу рендерит TemplateResponse."""
+    def render(request, *args, **kwargs):
+        # Потоки пула живут дольше запроса, поэтому, как и обработчик
+        # request_started, закрываем устаревшие соединения сами.
+        close_old_connections()
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            with template_timer():
+                response.render()
+        return response
+    return render
+
+
+class AsyncViewMixin:
+    """
+    Асинхронная версия представления на классе.
+
+    Django 3.2 не поддерживает async-методы в generic.View, поэтому
+    as_view возвращает корутину. Она выполняет всю синхронную обработку
+    запроса в ORM_EXECUTOR: запросы к базе и рендеринг шаблона не занимают
+    цикл событий, а число одновременно работающих потоков ограничено
+    настройкой ASYNC_ORM_THREADS.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        run = sync_to_async(
+            rendered(super().as_view(**initkwargs)),
+            thread_sensitive=False,
+            executor=ORM_EXECUTOR
+        )
+
+        async def view(request, *args, **kwargs):
+            return await run(request, *args, **kwargs)
+
+        view.view_class = cls
+        view.view_initkwargs = initkwargs
+        return view
+
+
+class NewsList(AsyncViewMixin, views.NewsList):
+    """Асинхронный список новостей и архив."""
+
+
+class NewsDetailView(AsyncViewMixin, views.NewsDetailView):
+    """Асинхронная страница новости с условным GET и формой комментария."""
@@ -0,0 +1,22 @@
+from django.db.models import F
+
+from .models import Comment
+from .zipstream import (
+    EXPORT_CHUNK_SIZE, csv_chunks, json_chunks, stream_zip
+)
+
+EXPORT_FORMATS = ('json', 'csv')
+COMMENT_FIELDS = ('id', 'news_id', 'news_title', 'text', 'created')
+
+
+def export_comments(user, export_format='json',
+                    chunk_size=EXPORT_CHUNK_SIZE):
+    """Архив с комментариями пользователя, читаемыми из базы частями."""
+    rows = Comment.objects.filter(author=user).order_by('id').values(
+        'id', 'news_id', 'text', 'created', news_title=F('news__title')
+    ).iterator(chunk_size=chunk_size)
+    if export_format == 'csv':
+        chunks = csv_chunks(rows, COMMENT_FIELDS, chunk_size)
+    else:
+        chunks = json_chunks(rows, chunk_size)
+    return stream_zip([(f'comments.{export_format}', chunks)])
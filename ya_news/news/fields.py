@@ -0,0 +1,16 @@
+from django.db import models
+
+from .streaming import timestamps_kept
+
+
+class TimestampField(models.DateTimeField):
+    """
+    Поле с auto_now или auto_now_add, которое при загрузке bulkload
+    сохраняет дату из файла, а не текущее время.
+    """
+    keeps_timestamps = True
+
+    def pre_save(self, model_instance, add):
+        if timestamps_kept():
+            return getattr(model_instance, self.attname)
+        return super().pre_save(model_instance, add)
@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .profanity import LexiconLoader
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +12,8 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = LexiconLoader(BAD_WORDS)
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +24,7 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        matcher = bad_words.get_matcher(settings.BAD_WORDS_FILE)
+        if matcher.search(text):
+            raise ValidationError(WARNING)
         return text
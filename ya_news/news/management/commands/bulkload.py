@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from news.models import Comment
+from news.streaming import BulkLoader, open_stream
+
+from .recount_comments import recount_comments
+
+
+class NewsBulkLoader(BulkLoader):
+    """Загрузчик, который пересчитывает счётчики комментариев новостей."""
+
+    comments_loaded = False
+
+    def after_flush(self, model, objects):
+        if model is Comment:
+            self.comments_loaded = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает данные из JSON Lines или JSON-массива '
+        'в формате фикстур, в том числе сжатых gzip (.gz).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        loader = NewsBulkLoader(
+            batch_size=options['batch_size'],
+            using=options['database'],
+            on_batch=self.report if options['verbosity'] > 1 else None,
+        )
+        for path in options['paths']:
+            with open_stream(path) as stream:
+                loader.load(stream)
+            self.report(loader.total, loader.elapsed)
+        if loader.comments_loaded:
+            recount_comments(using=options['database'])
+
+    def report(self, total, elapsed):
+        self.stdout.write(
+            f'Загружено объектов: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} объектов/с)'
+        )
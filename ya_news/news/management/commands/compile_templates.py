@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from yanews.template_cache import compile_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает все шаблоны проекта и проверяет ссылки '
+        'в {% extends %} и {% include %}. Запускается при выкладке.'
+    )
+
+    def handle(self, *args, **options):
+        compiled, errors = compile_templates()
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Шаблонов разобрано: {len(compiled)}'
+        ))
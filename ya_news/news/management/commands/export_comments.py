@@ -0,0 +1,45 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from news.export import (
+    EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_comments
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает комментарии пользователя zip-архивом в JSON или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('-o', '--output', required=True)
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default='json'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        started = time.perf_counter()
+        size = 0
+        with open(options['output'], 'wb') as output:
+            for data in export_comments(
+                user, options['format'], options['chunk_size']
+            ):
+                output.write(data)
+                size += len(data)
+        self.stdout.write(
+            f'Записано {size / 2 ** 20:.1f} МБ за '
+            f'{time.perf_counter() - started:.1f} с'
+        )
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from yanews.profiling import collect_profiles, profile_report, profile_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Объединяет профили cProfile из PROFILING_DIR и выводит самые '
+        'дорогие функции отдельно для каждого маршрута.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('views', nargs='*',
+                            help='имена маршрутов, по умолчанию все')
+        parser.add_argument('--dir', default=settings.PROFILING_DIR)
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--sort', default='cumulative',
+            choices=('cumulative', 'tottime', 'calls')
+        )
+        parser.add_argument(
+            '--token', action='store_true',
+            help=f'вывести значение заголовка {settings.PROFILING_HEADER}'
+        )
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(profile_token())
+            return
+        profiles = collect_profiles(options['dir'])
+        views = options['views'] or sorted(profiles)
+        if not any(profiles.get(view) for view in views):
+            raise CommandError(f'Нет профилей в {options["dir"]}')
+        for view in views:
+            paths = profiles.get(view)
+            if not paths:
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{view}: профилей {len(paths)}'
+            ))
+            self.stdout.write(
+                profile_report(paths, options['top'], options['sort'])
+            )
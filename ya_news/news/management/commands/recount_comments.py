@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.models import Comment, News
+
+
+def recount_comments(using='default'):
+    """Пересчитываем счётчики комментариев всех новостей одним запросом."""
+    counts = Comment.objects.using(using).filter(
+        news=OuterRef('pk')
+    ).order_by().values('news').annotate(total=Count('pk')).values('total')
+    return News.objects.using(using).update(
+        comment_count=Coalesce(Subquery(counts), 0)
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики комментариев новостей.'
+
+    def handle(self, *args, **options):
+        updated = recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено новостей: {updated}')
+        )
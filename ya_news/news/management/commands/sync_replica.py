@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в базы реплик. '
+        'Заменяет репликацию при локальной проверке чтения с реплик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Псевдонимы реплик, по умолчанию DATABASE_REPLICAS.'
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError('Не задано ни одной реплики.')
+        source = connections['default']
+        for alias in aliases:
+            target = connections[alias]
+            if {source.vendor, target.vendor} != {'sqlite'}:
+                raise CommandError('Копирование работает только для SQLite.')
+            source.ensure_connection()
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+            target.close()
+            self.stdout.write(self.style.SUCCESS(
+                f'Реплика {alias} обновлена.'
+            ))
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+import news.fields
+
+# Тип столбцов не меняется, поэтому меняем только состояние моделей:
+# AlterField в SQLite пересоздал бы таблицы вместе с триггерами поиска.
+STATE_OPERATIONS = [
+    migrations.AlterField(
+        model_name='comment',
+        name='created',
+        field=news.fields.TimestampField(auto_now_add=True),
+    ),
+    migrations.AlterField(
+        model_name='news',
+        name='updated',
+        field=news.fields.TimestampField(auto_now=True),
+    ),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_search'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=STATE_OPERATIONS
+        ),
+    ]
@@ -0,0 +1,126 @@
+import os
+import threading
+import unicodedata
+from collections import deque
+
+# Латинские буквы и цифры, которые выглядят как кириллические.
+LOOKALIKES = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к',
+    'm': 'м', 'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у',
+    '0': 'о', '3': 'з', '6': 'б',
+})
+
+
+def normalize(text):
+    """
+    Приводим текст к виду для поиска.
+
+    Раскрываем совместимые символы Unicode, убираем диакритику (ё → е),
+    понижаем регистр и заменяем похожие латинские буквы кириллическими.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(
+        char for char in text if not unicodedata.combining(char)
+    )
+    return text.casefold().translate(LOOKALIKES)
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска любого слова из словаря.
+
+    Строится один раз, после чего проверка занимает время,
+    линейное по длине текста, независимо от размера словаря.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.terminal = [False]
+        for word in words:
+            self._add(normalize(word))
+        self._link()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][char] = next_state
+                self.transitions.append({})
+                self.fail.append(0)
+                self.terminal.append(False)
+            state = next_state
+        self.terminal[state] = True
+
+    def _link(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(
+                    char, 0
+                )
+                if self.terminal[self.fail[next_state]]:
+                    self.terminal[next_state] = True
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно слово из словаря."""
+        transitions, fail, terminal = (
+            self.transitions, self.fail, self.terminal
+        )
+        state = 0
+        for char in normalize(text):
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+
+def read_words(path):
+    """Слова из файла словаря: по одному в строке, # — комментарий."""
+    with open(path, encoding='utf-8') as words_file:
+        for line in words_file:
+            word = line.split('#', 1)[0].strip()
+            if word:
+                yield word
+
+
+class LexiconLoader:
+    """
+    Автомат для словаря из файла и встроенных слов.
+
+    Автомат строится один раз на процесс и перестраивается,
+    когда меняется время изменения файла.
+    """
+
+    def __init__(self, builtin_words=()):
+        self.builtin_words = tuple(builtin_words)
+        self._lock = threading.Lock()
+        self._key = None
+        self._matcher = None
+
+    def get_matcher(self, path=None):
+        try:
+            mtime = os.stat(path).st_mtime_ns if path else None
+        except FileNotFoundError:
+            mtime = None
+        key = (path, mtime)
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    words = list(self.builtin_words)
+                    if mtime is not None:
+                        words.extend(read_words(path))
+                    self._matcher = WordMatcher(words)
+                    self._key = key
+        return self._matcher
@@ -1,7 +1,10 @@
+from copy import deepcopy
 from datetime import datetime, timedelta
 
 import pytest
 from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import override_settings
 from django.test.client import Client
 from django.urls import reverse
 from django.utils import timezone
@@ -100,11 +103,31 @@ def detail_url(get_id):
     return reverse('news:detail', kwargs={'pk': get_id})
 
 
+@pytest.fixture
+def comments_url(get_id):
+    return reverse('news:comments', kwargs={'pk': get_id})
+
+
 @pytest.fixture
 def home_url():
     return reverse('news:home')
 
 
+@pytest.fixture
+def archive_url():
+    return reverse('news:archive')
+
+
+@pytest.fixture
+def search_url():
+    return reverse('news:search')
+
+
+@pytest.fixture
+def export_url():
+    return reverse('news:export')
+
+
 @pytest.fixture
 def login_url():
     return reverse('users:login')
@@ -139,3 +162,32 @@ def comment_url(detail_url):
 @pytest.fixture(autouse=True)
 def db_auto_use(db):
     return db
+
+
+@pytest.fixture(scope='session', autouse=True)
+def run_dirs(tmp_path_factory):
+    """Кэш сессий и метрики каждого запуска тестов — в своих каталогах."""
+    cache_settings = deepcopy(settings.CACHES)
+    cache_settings['sessions']['LOCATION'] = (
+        tmp_path_factory.mktemp('cache') / 'sessions'
+    )
+    with override_settings(
+        CACHES=cache_settings,
+        METRICS_DIR=tmp_path_factory.mktemp('metrics'),
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    caches['sessions'].clear()
+    yield
+    cache.clear()
+    caches['sessions'].clear()
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget(settings):
+    """Превышение бюджета SQL-запросов в тестах — ошибка."""
+    settings.QUERY_BUDGET_STRICT = True
@@ -1,6 +1,16 @@
+import copy
+import importlib
+import sys
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+import pytest
 from django.conf import settings
+from django.core.management import CommandError, call_command
 
 from news.forms import CommentForm
+from news.models import News
 
 
 def test_count_news(client, bulk_news, home_url, db_auto_use):
@@ -20,6 +30,101 @@ def test_order_news(client, bulk_news, home_url):
     assert news_sorted == all_dates
 
 
+def test_home_page_single_query(client, bulk_news, comments_bulk,
+                                home_url, django_assert_num_queries):
+    """Главная страница выводит счётчики без загрузки комментариев."""
+    with django_assert_num_queries(1):
+        response = client.get(home_url)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_home_page_story_cache(author_client, news, detail_url,
+                               form_data, home_url):
+    """Закэшированный блок новости обновляется после комментария."""
+    response = author_client.get(home_url)
+    assert 'Комментариев' not in response.content.decode()
+    author_client.post(detail_url, form_data)
+    response = author_client.get(home_url)
+    assert 'Комментариев: 1' in response.content.decode()
+    comment = news.comment_set.get()
+    comment.text = 'Исправленный текст'
+    comment.save()
+    author_client.post(detail_url, form_data)
+    response = author_client.get(home_url)
+    assert 'Комментариев: 2' in response.content.decode()
+
+
+def test_home_page_story_cache_news_edit(client, news, home_url):
+    """Изменение новости сбрасывает только её закэшированный блок."""
+    client.get(home_url)
+    news.title = 'Новый заголовок'
+    news.save()
+    response = client.get(home_url)
+    assert 'Новый заголовок' in response.content.decode()
+
+
+def test_home_page_story_cache_recount(client, news, comment, home_url):
+    """Пересчёт счётчиков не оставляет в кэше блоки со старым числом."""
+    News.objects.update(comment_count=5)
+    assert 'Комментариев: 5' in client.get(home_url).content.decode()
+    call_command('recount_comments', stdout=StringIO())
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+
+def test_archive_pages(client, bulk_news, archive_url):
+    """Архив по курсору выводит все новости без повторов."""
+    response = client.get(archive_url)
+    assert len(
+        response.context['object_list']
+    ) == settings.NEWS_COUNT_ON_HOME_PAGE
+    all_news = []
+    while True:
+        all_news += [news.pk for news in response.context['object_list']]
+        next_cursor = response.context['next_cursor']
+        if next_cursor is None:
+            break
+        response = client.get(archive_url, {'cursor': next_cursor})
+    assert all_news == list(
+        News.objects.order_by('-date', '-id').values_list('pk', flat=True)
+    )
+
+
+def test_archive_bad_cursor(client, archive_url):
+    """Некорректный курсор приводит к ошибке 404."""
+    response = client.get(archive_url, {'cursor': 'не-курсор'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_search_ranked_and_highlighted(client, search_url):
+    """Поиск находит новости по началу слова и подсвечивает совпадения."""
+    News.objects.create(title='Погода', text='Завтра будет <b>дождь</b>.')
+    News.objects.create(title='Дождливый день', text='Дождь и снова дождь.')
+    News.objects.create(title='Спорт', text='Матч перенесли.')
+    response = client.get(search_url, {'q': 'дожд'})
+    results = response.context['results']
+    assert [news.title for news in results] == ['Дождливый день', 'Погода']
+    assert '<mark>Дождливый</mark>' in results[0].title_highlight
+    assert '&lt;b&gt;<mark>дождь</mark>' in results[1].snippet
+
+
+def test_search_follows_changes(client, news, search_url):
+    """Индекс поиска обновляется вместе с новостями."""
+    news.title = 'Метеорит'
+    news.save()
+    response = client.get(search_url, {'q': 'метеорит'})
+    assert list(response.context['results']) == [news]
+    news.delete()
+    response = client.get(search_url, {'q': 'метеорит'})
+    assert list(response.context['results']) == []
+
+
+def test_search_paginated(client, bulk_news, search_url):
+    """Результаты поиска выводятся по страницам."""
+    response = client.get(search_url, {'q': 'новость'})
+    assert len(response.context['results']) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert response.context['paginator'].count == News.objects.count()
+
+
 def test_comments(client, get_id, comments_bulk, detail_url):
     """Проверяем что наши комментарии отсортированы."""
     response = client.get(detail_url)
@@ -31,6 +136,37 @@ def test_comments(client, get_id, comments_bulk, detail_url):
     assert all_timestamps == sorted_comments
 
 
+def test_comments_first_page(client, comments_bulk, detail_url,
+                             comments_url, settings):
+    """На странице новости выводится только первая страница комментариев."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 5
+    response = client.get(detail_url)
+    first_page = response.context['comments']
+    assert len(first_page) == 5
+    shown = [comment.pk for comment in first_page]
+    next_cursor = response.context['next_cursor']
+    while next_cursor:
+        data = client.get(
+            comments_url, {'cursor': next_cursor, 'format': 'json'}
+        ).json()
+        shown += [comment['id'] for comment in data['comments']]
+        next_cursor = data['next_cursor']
+    news = response.context['news']
+    assert shown == list(
+        news.comment_set.order_by('created', 'id').values_list('pk', flat=True)
+    )
+
+
+def test_comments_html_fragment(client, comments_bulk, detail_url,
+                                comments_url, settings):
+    """Следующая страница комментариев отдаётся HTML-фрагментом."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 5
+    next_cursor = client.get(detail_url).context['next_cursor']
+    response = client.get(comments_url, {'cursor': next_cursor})
+    assert len(response.context['comments']) == 5
+    assert '<html>' not in response.content.decode()
+
+
 def test_anonymous_client_has_no_form(client, detail_url):
     """Проверяем что у анонимного юзера нет формы."""
     response = client.get(detail_url)
@@ -42,3 +178,37 @@ def test_authorized_client_has_form(author_client, detail_url):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_compile_templates():
+    """Все шаблоны проекта разбираются без ошибок."""
+    stdout = StringIO()
+    call_command('compile_templates', stdout=stdout)
+    assert 'Шаблонов разобрано: ' in stdout.getvalue()
+
+
+def test_compile_templates_errors(settings, tmp_path):
+    """Команда находит синтаксические ошибки и несуществующие вставки."""
+    (tmp_path / 'broken.html').write_text('{% if %}')
+    (tmp_path / 'missing.html').write_text('{% include "nothing.html" %}')
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['DIRS'].append(tmp_path)
+    settings.TEMPLATES = templates
+    stderr = StringIO()
+    with pytest.raises(CommandError, match='Шаблонов с ошибками: 2'):
+        call_command('compile_templates', stderr=stderr)
+    assert 'broken.html' in stderr.getvalue()
+    assert 'nothing.html' in stderr.getvalue()
+
+
+@pytest.mark.parametrize('module', ('yanews.wsgi', 'yanews.asgi'))
+def test_templates_warmed_up_on_start(module, caplog):
+    """WSGI и ASGI разбирают шаблоны при старте и пишут ошибки в лог."""
+    with mock.patch(
+        'yanews.template_cache.compile_templates',
+        return_value=(['news/home.html'], {'broken.html': 'ошибка'})
+    ) as compile_templates:
+        sys.modules.pop(module, None)
+        importlib.import_module(module)
+    compile_templates.assert_called_once_with()
+    assert 'Шаблон broken.html не разобран: ошибка' in caplog.messages
@@ -1,9 +1,27 @@
+import csv
+import json
+import os
+import random
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from http import HTTPStatus
+from io import BytesIO, StringIO
+from unittest import mock
 
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connections
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
 from pytest_django.asserts import assertRedirects, assertFormError
 
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.models import Comment, News
+from news import streaming
+from news.streaming import keep_timestamps
 
 
 def test_anonymous_user_cant_create_comment(client, detail_url, form_data):
@@ -52,6 +70,36 @@ def test_user_cant_use_bad_words(author_client, detail_url):
     assert Comment.objects.count() == 0
 
 
+@pytest.mark.parametrize(
+    'text',
+    (
+        'РЕДИСКА',
+        'pедиcкa',
+        'нeгoдяй!',
+        'не\u0433\u043e\u0434\u044f\u0306й',
+    )
+)
+def test_user_cant_use_disguised_bad_words(author_client, detail_url, text):
+    """Запрещённые слова находятся в любом регистре и с похожими буквами."""
+    response = author_client.post(detail_url, data={'text': text})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+def test_bad_words_file_reloaded(author_client, detail_url,
+                                 settings, tmp_path):
+    """Изменения файла со словарём подхватываются без перезапуска."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('бяка\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = words_file
+    response = author_client.post(detail_url, data={'text': 'Ну ты бяка'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    words_file.write_text('злюка\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 1))
+    response = author_client.post(detail_url, data={'text': 'Ну ты бяка'})
+    assert Comment.objects.count() == 1
+
+
 def test_author_can_delete_comment(author_client,
                                    news,
                                    delete_url,
@@ -94,3 +142,255 @@ def test_user_cant_edit_comment_of_another_user(edit_url,
     url = edit_url
     response = not_author_client.post(url, form_data)
     assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_comment_count_follows_comments(author_client, detail_url,
+                                        form_data, news):
+    """Счётчик комментариев растёт при создании и уменьшается при удалении."""
+    author_client.post(detail_url, form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get()
+    author_client.delete(reverse('news:delete', args=(comment.pk,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_recount_comments_command(comment, news):
+    """Команда восстанавливает счётчики по фактическим комментариям."""
+    News.objects.update(comment_count=100)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_detail_not_modified(client, author_client, detail_url,
+                             form_data, django_assert_num_queries):
+    """Повторный запрос новой версии страницы получает ответ 304."""
+    response = client.get(detail_url)
+    etag = response['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    author_client.post(detail_url, form_data)
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_detail_modified_since_ignored(client, detail_url):
+    """Страница проверяется только по ETag: у дат точность в секунду."""
+    response = client.get(detail_url)
+    assert not response.has_header('Last-Modified')
+    response = client.get(
+        detail_url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_detail_conditional_get_skipped_for_user(author_client, detail_url):
+    """Для авторизованного пользователя страница не кэшируется клиентом."""
+    response = author_client.get(detail_url)
+    assert not response.has_header('ETag')
+
+
+@pytest.mark.parametrize('file_name', ('data.jsonl', 'data.jsonl.gz'))
+def test_bulk_dump_and_load(comment, news, author, tmp_path, file_name):
+    """Выгрузка и потоковая загрузка сохраняют данные и счётчики."""
+    path = tmp_path / file_name
+    call_command('bulkdump', '-o', str(path), stderr=StringIO())
+    # JSON хранит время с точностью до миллисекунд.
+    created = comment.created.replace(
+        microsecond=comment.created.microsecond // 1000 * 1000
+    )
+    Comment.objects.all().delete()
+    News.objects.all().delete()
+    call_command('bulkload', str(path), '--batch-size', '1', stdout=StringIO())
+    loaded = Comment.objects.get()
+    assert loaded.text == comment.text
+    assert loaded.created == created
+    assert loaded.news.comment_count == 1
+
+
+def test_bulk_load_fixture_array(tmp_path, settings):
+    """Загрузка понимает JSON-массив в формате фикстуры."""
+    fixture = settings.BASE_DIR / 'news' / 'fixtures' / 'news.json'
+    call_command('bulkload', str(fixture), stdout=StringIO())
+    with open(fixture, encoding='utf-8') as fixture_file:
+        assert News.objects.count() == fixture_file.read().count('news.news')
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_bulk_load_other_database(comment, author, tmp_path):
+    """Счётчики пересчитываются в той базе, куда шла загрузка."""
+    author.save(using='replica')
+    News.objects.update(comment_count=0)
+    path = tmp_path / 'data.jsonl'
+    call_command('bulkdump', '-o', str(path), stderr=StringIO())
+    call_command(
+        'bulkload', str(path), '--database', 'replica', stdout=StringIO()
+    )
+    assert News.objects.using('replica').get().comment_count == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_load_forward_reference(tmp_path):
+    """Запись может ссылаться на объект из следующей пачки."""
+    records = (
+        {'model': 'news.comment', 'pk': 1, 'fields': {
+            'news': 1, 'author': 1, 'text': 'Текст',
+            'created': '2024-01-01T00:00:00Z',
+        }},
+        {'model': 'news.news', 'pk': 1, 'fields': {
+            'title': 'Заголовок', 'text': 'Текст', 'date': '2024-01-01',
+        }},
+        {'model': 'auth.user', 'pk': 1, 'fields': {
+            'username': 'Автор', 'password': '',
+        }},
+    )
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps(records), encoding='utf-8')
+    call_command('bulkload', str(path), '--batch-size', '1', stdout=StringIO())
+    assert News.objects.get().comment_count == 1
+    path.write_text(json.dumps(records[:1]), encoding='utf-8')
+    Comment.objects.all().delete()
+    News.objects.all().delete()
+    with pytest.raises(IntegrityError):
+        call_command('bulkload', str(path), stdout=StringIO())
+
+
+def test_json_array_long_record():
+    """Длинный элемент разбирается, а повреждённый не читается целиком."""
+    text = 'т' * (streaming.READ_CHUNK_SIZE * 5)
+    records = streaming.iter_json_array(
+        StringIO(json.dumps([{'text': text}, {'text': ''}])[1:])
+    )
+    assert [record['text'] for record in records] == [text, '']
+    broken = StringIO('{"text": "' + text)
+    with mock.patch.object(
+        streaming, 'MAX_RECORD_SIZE', streaming.READ_CHUNK_SIZE * 2
+    ):
+        with pytest.raises(ValueError):
+            list(streaming.iter_json_array(broken))
+    assert broken.tell() < len(text)
+
+
+def test_keep_timestamps_is_local(news, author):
+    """Даты из файла не мешают проставлять время в других потоках."""
+    field = Comment._meta.get_field('created')
+    created = timezone.now() - timedelta(days=30)
+    comment = Comment(news=news, author=author, text='Текст', created=created)
+    with keep_timestamps(Comment, [comment]):
+        assert field.auto_now_add
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            elsewhere = executor.submit(
+                field.pre_save, Comment(created=created), True
+            ).result()
+        Comment.objects.bulk_create([comment])
+    assert elsewhere > created
+    assert Comment.objects.get().created == created
+
+
+def read_archive(data, name):
+    with zipfile.ZipFile(BytesIO(data)) as archive:
+        assert archive.namelist() == [name]
+        return archive.read(name).decode()
+
+
+def test_export_comments_json(author_client, not_author_client,
+                              comment, news, export_url):
+    """Выгрузка в JSON содержит только комментарии пользователя."""
+    response = author_client.get(export_url)
+    assert response.streaming
+    comments = json.loads(read_archive(
+        b''.join(response.streaming_content), 'comments.json'
+    ))
+    assert [
+        (row['id'], row['news_title'], row['text']) for row in comments
+    ] == [(comment.pk, news.title, comment.text)]
+    response = not_author_client.get(export_url)
+    assert json.loads(read_archive(
+        b''.join(response.streaming_content), 'comments.json'
+    )) == []
+
+
+def test_export_comments_csv_command(comments_bulk, author, tmp_path):
+    """Команда выгрузки пишет CSV по частям в zip-архив."""
+    path = tmp_path / 'comments.zip'
+    call_command(
+        'export_comments', author.username, '-o', str(path),
+        '--format', 'csv', '--chunk-size', '3', stdout=StringIO()
+    )
+    rows = list(csv.DictReader(StringIO(
+        read_archive(path.read_bytes(), 'comments.csv')
+    )))
+    assert len(rows) == Comment.objects.filter(author=author).count()
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas(tmp_path):
+    """Новое соединение с файлом базы включает WAL и ожидание блокировки."""
+    default = connections['default']
+    wrapper = type(default)(
+        {**default.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')}
+    )
+    try:
+        with wrapper.cursor() as cursor:
+            pragmas = {
+                name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('journal_mode', 'synchronous', 'busy_timeout')
+            }
+    finally:
+        wrapper.close()
+    assert pragmas == {
+        'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000
+    }
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_read_only_views_use_replica(replica, client, news, home_url):
+    """Главная и страница новости читают новости с реплики."""
+    replica_news = News.objects.using('replica').create(
+        pk=news.pk + 1, title='Только на реплике', text='Текст новости'
+    )
+    response = client.get(home_url)
+    assert list(response.context['object_list']) == [replica_news]
+    for pk, status in (
+        (news.pk, HTTPStatus.NOT_FOUND), (replica_news.pk, HTTPStatus.OK)
+    ):
+        url = reverse('news:detail', args=(pk,))
+        assert client.get(url).status_code == status
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_author_reads_own_comment_after_post(
+        replica, author_client, not_author_client, news, detail_url,
+        form_data
+):
+    """После записи автор читает из основной базы, остальные — с реплики."""
+    News.objects.using('replica').create(
+        pk=news.pk, title=news.title, text=news.text
+    )
+    author_client.post(detail_url, data=form_data)
+    comments = author_client.get(detail_url).context['comments']
+    assert [comment.text for comment in comments] == [form_data['text']]
+    assert not_author_client.get(detail_url).context['comments'] == []
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+def test_replica_chosen_once_per_request(replica, client, news, comment,
+                                         detail_url):
+    """Все чтения одного запроса идут на одну и ту же реплику."""
+    News.objects.using('replica').create(
+        pk=news.pk, title=news.title, text=news.text
+    )
+    with mock.patch(
+        'yanews.db_router.random.choice', wraps=random.choice
+    ) as choice:
+        assert client.get(detail_url).status_code == HTTPStatus.OK
+    choice.assert_called_once_with(['replica'])
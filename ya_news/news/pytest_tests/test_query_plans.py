@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from yanews.query_plans import captured_plan_problems, plan_problems
+
+author = pytest.lazy_fixture('author_client')
+anonym = pytest.lazy_fixture('client')
+
+
+def assert_good_plans(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as queries:
+        getattr(client, method)(url, data)
+    assert captured_plan_problems(queries.captured_queries) == {}
+
+
+def test_detects_problems():
+    """Проверка сама находит полный проход и сортировку."""
+    problems = plan_problems(
+        "SELECT * FROM news_news WHERE text = 'x' ORDER BY title"
+    )
+    assert len(problems) == 2
+
+
+@pytest.mark.parametrize(
+    'url, user',
+    (
+        (pytest.lazy_fixture('home_url'), anonym),
+        (pytest.lazy_fixture('archive_url'), anonym),
+        (pytest.lazy_fixture('detail_url'), anonym),
+        (pytest.lazy_fixture('detail_url'), author),
+        (pytest.lazy_fixture('comments_url'), author),
+        (pytest.lazy_fixture('edit_url'), author),
+        (pytest.lazy_fixture('delete_url'), author),
+    )
+)
+def test_read_views(url, user, bulk_news, comments_bulk, comment):
+    """Страницы новостей читают данные по индексам."""
+    assert_good_plans(user, 'get', url)
+
+
+def test_archive_cursor_page(client, bulk_news, archive_url):
+    """Страница архива после курсора читается по индексу."""
+    cursor = client.get(archive_url).context['next_cursor']
+    assert_good_plans(client, 'get', archive_url, {'cursor': cursor})
+
+
+def test_comments_cursor_page(client, comments_bulk, detail_url,
+                              comments_url, settings):
+    """Следующая страница комментариев читается по индексу."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 5
+    cursor = client.get(detail_url).context['next_cursor']
+    assert_good_plans(client, 'get', comments_url, {'cursor': cursor})
+
+
+def test_search(client, bulk_news, search_url):
+    """Поиск обращается к индексу FTS5, а не к таблице новостей."""
+    assert_good_plans(client, 'get', search_url, {'q': 'новость'})
+
+
+@pytest.mark.parametrize(
+    'url, data',
+    (
+        (pytest.lazy_fixture('detail_url'), pytest.lazy_fixture('form_data')),
+        (pytest.lazy_fixture('edit_url'), pytest.lazy_fixture('form_data')),
+        (pytest.lazy_fixture('delete_url'), None),
+    )
+)
+def test_write_views(author_client, url, data):
+    """Запись комментариев не требует полных проходов по таблицам."""
+    assert_good_plans(author_client, 'post', url, data)
@@ -1,9 +1,30 @@
+import asyncio
+import multiprocessing
+import pstats
+import re
+import runpy
+import sys
 from http import HTTPStatus
+from unittest import mock
 
 import pytest
-from django.test import Client
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
 from pytest_django.asserts import assertRedirects
 
+from news.async_views import ORM_EXECUTOR
+from news.signals import COMMENT_WRITES
+from yanews.metrics import render
+from yanews.profiling import collect_profiles, profile_path, profile_token
+from yanews.query_budget import QueryBudgetExceeded, query_budget
+
 
 anonym = Client()
 not_author = pytest.lazy_fixture('not_author_client')
@@ -13,14 +34,26 @@ OK = HTTPStatus.OK
 NOT_FOUND = HTTPStatus.NOT_FOUND
 
 
+def session_cached(cache_key, flushed):
+    """
+    Воркер, который уже обслуживал пользователя: после его выхода
+    в другом воркере сессии не должно быть и в этом кэше.
+    """
+    flushed.wait()
+    sys.exit(caches['sessions'].get(cache_key) is not None)
+
+
 @pytest.mark.parametrize(
     'url, user, status',
     (
         (pytest.lazy_fixture('home_url'), anonym, OK),
+        (pytest.lazy_fixture('archive_url'), anonym, OK),
+        (pytest.lazy_fixture('search_url'), anonym, OK),
         (pytest.lazy_fixture('login_url'), anonym, OK),
         (pytest.lazy_fixture('logout_url'), anonym, OK),
         (pytest.lazy_fixture('signup_url'), anonym, OK),
         (pytest.lazy_fixture('detail_url'), anonym, OK),
+        (pytest.lazy_fixture('comments_url'), anonym, OK),
         (pytest.lazy_fixture('edit_url'), not_author, NOT_FOUND),
         (pytest.lazy_fixture('edit_url'), author, OK),
         (pytest.lazy_fixture('delete_url'), not_author, NOT_FOUND),
@@ -39,10 +72,257 @@ def test_base_pages_availability_for_anonymous_user(client,
 
 @pytest.mark.parametrize(
     'url',
-    (pytest.lazy_fixture('edit_url'), pytest.lazy_fixture('delete_url'))
+    (
+        pytest.lazy_fixture('edit_url'),
+        pytest.lazy_fixture('delete_url'),
+        pytest.lazy_fixture('export_url'),
+    )
 )
 def test_redirect_for_anonymous_client(client, url, get_id, login_url):
     """Проверка на переадресацию для анонимного юзера."""
     excepted_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, excepted_url)
+
+
+@pytest.mark.parametrize(
+    'url, user, view_name',
+    (
+        (pytest.lazy_fixture('home_url'), author, 'news:home'),
+        (pytest.lazy_fixture('detail_url'), author, 'news:detail'),
+        (pytest.lazy_fixture('edit_url'), author, 'news:edit'),
+        (pytest.lazy_fixture('delete_url'), author, 'news:delete'),
+    )
+)
+def test_pages_fit_query_budget(url, user, view_name, comments_bulk):
+    """Страницы укладываются в бюджет SQL-запросов из настроек."""
+    with query_budget(view_name):
+        user.get(url)
+
+
+def test_query_budget_exceeded(author_client, settings, home_url):
+    """Превышение бюджета в строгом режиме приводит к ошибке."""
+    settings.QUERY_BUDGETS = {'news:home': 1}
+    with pytest.raises(QueryBudgetExceeded):
+        author_client.get(home_url)
+
+
+def test_streaming_queries_counted(
+    author_client, settings, export_url, comment
+):
+    """Запросы при выдаче потокового ответа входят в бюджет маршрута."""
+    settings.QUERY_BUDGETS = {'news:export': 1}
+    response = author_client.get(export_url)
+    with pytest.raises(QueryBudgetExceeded):
+        b''.join(response.streaming_content)
+
+
+def test_query_wrappers_not_leaked(author_client, detail_url, home_url):
+    """Счётчик и таймер запросов не копятся в обёртках соединений."""
+    author_client.get(detail_url)
+    wrappers = [list(db.execute_wrappers) for db in connections.all()]
+    for url in (detail_url, home_url, detail_url, home_url):
+        author_client.get(url)
+    assert [list(db.execute_wrappers) for db in connections.all()] == wrappers
+
+
+def test_session_read_from_cache(author_client, detail_url):
+    """Сессия авторизованного пользователя читается из кэша, а не из базы."""
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.get(detail_url)
+    assert response.context['user'].is_authenticated
+    assert not [
+        query for query in queries.captured_queries
+        if 'django_session' in query['sql']
+    ]
+
+
+def test_flushed_session_rejected(author_client, detail_url, logout_url):
+    """После выхода старый ключ сессии не действует ни в одном воркере."""
+    key = author_client.cookies[settings.SESSION_COOKIE_NAME].value
+    context = multiprocessing.get_context('fork')
+    flushed = context.Event()
+    worker = context.Process(
+        target=session_cached, args=(SessionStore(key).cache_key, flushed)
+    )
+    worker.start()
+    author_client.get(logout_url)
+    flushed.set()
+    worker.join()
+    assert worker.exitcode == 0
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = key
+    assert client.get(detail_url).context['user'].is_anonymous
+
+
+def server_timing(response):
+    """Длительности из заголовка Server-Timing по именам метрик."""
+    return {
+        name: float(duration) for name, duration in re.findall(
+            r'(\w+);dur=([\d.]+)', response['Server-Timing']
+        )
+    }
+
+
+def test_server_timing(author_client, detail_url, caplog):
+    """Заголовок и строка лога разбивают время на SQL, шаблоны и view."""
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.get(detail_url)
+    timing = server_timing(response)
+    assert f'SQL, {len(queries)} q' in response['Server-Timing']
+    assert timing['db'] > 0 and timing['tpl'] > 0
+    assert timing['view'] >= timing['db'] + timing['tpl']
+    (record,) = [
+        record for record in caplog.records
+        if record.name == 'yanews.server_timing'
+    ]
+    assert record.server_timing['view'] == 'news:detail'
+    assert record.server_timing['queries'] == len(queries)
+
+
+async def asgi_get(url):
+    return await AsyncClient().get(url)
+
+
+@pytest.mark.parametrize(
+    'url, view_name',
+    (
+        (pytest.lazy_fixture('home_url'), 'news:home'),
+        (pytest.lazy_fixture('archive_url'), 'news:archive'),
+        (pytest.lazy_fixture('detail_url'), 'news:detail'),
+    )
+)
+@pytest.mark.django_db(transaction=True)
+def test_async_views_under_asgi(url, view_name, news):
+    """
+    Под ASGI страницы чтения новостей асинхронные и укладываются в бюджет.
+
+    Запросы к базе выполняются в потоках пула, поэтому базе нужны
+    настоящие транзакции, а не общая транзакция теста.
+    """
+    match = resolve(url, urlconf=settings.ASGI_URLCONF)
+    assert asyncio.iscoroutinefunction(match.func)
+    with query_budget(view_name) as counter:
+        response = async_to_sync(asgi_get)(url)
+    assert response.status_code == OK
+    assert news.title in response.content.decode()
+    assert counter.count > 0
+    assert server_timing(response)['tpl'] > 0
+
+
+@pytest.mark.parametrize('urlconf, in_pool', (
+    (settings.ASGI_URLCONF, True), (None, False),
+))
+@pytest.mark.django_db(transaction=True)
+def test_async_views_switch(settings, detail_url, news, urlconf, in_pool):
+    """Без ASGI_URLCONF под ASGI работают синхронные представления."""
+    settings.ASGI_URLCONF = urlconf
+    with mock.patch.object(
+        ORM_EXECUTOR, 'submit', wraps=ORM_EXECUTOR.submit
+    ) as submit:
+        response = async_to_sync(asgi_get)(detail_url)
+    assert response.status_code == OK
+    assert submit.called == in_pool
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING_DIR = tmp_path
+    settings.PROFILING_SAMPLE_RATE = 0
+    return tmp_path
+
+
+def test_profiling_signed_header(client, detail_url, profiling):
+    """Профилируется только запрос с верно подписанным заголовком."""
+    client.get(detail_url, HTTP_X_PROFILE='profile:подделка')
+    client.get(detail_url)
+    assert not list(profiling.iterdir())
+    client.get(detail_url, HTTP_X_PROFILE=profile_token())
+    (path,) = profiling.glob('news.detail.*.prof')
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+def test_profiling_rotation_and_report(client, detail_url, home_url,
+                                       profiling, settings, capsys):
+    """Хранятся последние профили, отчёт сводит их по маршрутам."""
+    settings.PROFILING_SAMPLE_RATE = 1
+    settings.PROFILING_MAX_FILES = 3
+    for url in (home_url, detail_url, detail_url, detail_url):
+        client.get(url)
+    assert len(list(profiling.glob('news.detail.*.prof'))) == 3
+    assert not list(profiling.glob('news.home.*'))
+    call_command('profile_report', dir=profiling, top=5)
+    output = capsys.readouterr().out
+    assert 'news:detail: профилей 3' in output
+    assert 'function calls' in output
+
+
+@pytest.mark.django_db(transaction=True)
+def test_profiling_off_under_asgi(detail_url, profiling, settings, caplog):
+    """Под ASGI запрос из выборки не профилируется, а отмечается в логе."""
+    settings.PROFILING_SAMPLE_RATE = 1
+    assert async_to_sync(asgi_get)(detail_url).status_code == OK
+    assert not list(profiling.iterdir())
+    assert (
+        f'Запрос {detail_url} не профилируется: под ASGI профилирование '
+        'отключено.'
+    ) in caplog.messages
+
+
+def test_profile_nested_namespace(profiling):
+    """Имя маршрута из вложенных пространств имён читается из файла."""
+    path = profile_path(profiling, 'a:b:view')
+    path.touch()
+    assert collect_profiles(profiling) == {'a:b:view': [path]}
+
+
+@pytest.mark.parametrize('address, status', (
+    ('127.0.0.1', OK), ('::1', OK), ('203.0.113.5', HTTPStatus.FORBIDDEN),
+))
+def test_metrics_allowed_networks(client, address, status):
+    """/metrics отдаётся только клиентам из METRICS_ALLOWED_NETWORKS."""
+    assert client.get('/metrics', REMOTE_ADDR=address).status_code == status
+
+
+def test_metrics_cleared_on_start(settings, tmp_path):
+    """Мастер gunicorn при старте удаляет метрики прошлого запуска."""
+    settings.METRICS_DIR = tmp_path
+    COMMENT_WRITES.inc(action='create')
+    hooks = runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+    hooks['on_starting'](None)
+    assert not list(tmp_path.glob('*.db'))
+    COMMENT_WRITES.inc(action='create')
+    assert 'comment_writes_total{action="create"} 1.0' in render(
+        tmp_path
+    ).splitlines()
+
+
+def test_metrics(author_client, detail_url, form_data, settings, tmp_path):
+    """/metrics сводит метрики всех процессов хоста."""
+    settings.METRICS_DIR = tmp_path
+    author_client.get(detail_url)
+    author_client.post(detail_url, form_data)
+    # Другой воркер того же хоста пишет в свой файл.
+    worker = multiprocessing.get_context('fork').Process(
+        target=COMMENT_WRITES.inc, args=(2,), kwargs={'action': 'create'}
+    )
+    worker.start()
+    worker.join()
+    assert len(list(tmp_path.glob('*.db'))) == 2
+    response = Client().get('/metrics')
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    lines = response.content.decode().splitlines()
+    for line in (
+        'comment_writes_total{action="create"} 3.0',
+        'http_requests_total{view="news:detail",method="GET",status="200"} '
+        '1.0',
+        'http_requests_total{view="news:detail",method="POST",status="302"} '
+        '1.0',
+        'http_request_duration_seconds_bucket{view="news:detail",le="+Inf"} '
+        '2.0',
+        'http_request_duration_seconds_count{view="news:detail"} 2.0',
+        'cache_requests_total{cache="sessions",result="hit"} 2.0',
+    ):
+        assert line in lines
+    assert any(line.startswith('db_queries_total{view="news:detail"}')
+               for line in lines)
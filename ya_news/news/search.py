@@ -0,0 +1,89 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+
+# Служебные символы, которыми FTS5 отмечает найденное в тексте;
+# меняем их на теги только после экранирования текста.
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_TOKENS = 20
+
+# rank в FTS5 по умолчанию равен bm25(), и сортировку по нему
+# таблица выполняет сама, без временного B-дерева.
+SEARCH_SQL = f"""
+    SELECT
+        news_search.rowid,
+        highlight(news_search, 0, '{MARK_START}', '{MARK_END}'),
+        snippet(
+            news_search, 1, '{MARK_START}', '{MARK_END}', '…',
+            {SNIPPET_TOKENS}
+        )
+    FROM news_search
+    WHERE news_search MATCH %s
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+COUNT_SQL = 'SELECT count(*) FROM news_search WHERE news_search MATCH %s'
+
+
+def build_match_query(query):
+    """
+    Превращаем ввод пользователя в запрос FTS5.
+
+    Каждое слово ищется как префикс, все слова должны встретиться.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def highlight(text):
+    """Экранируем текст и превращаем отметки FTS5 в теги <mark>."""
+    return mark_safe(
+        escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """
+    Найденные новости в порядке релевантности (bm25).
+
+    Объект ленивый: Paginator запрашивает у него только число
+    результатов и срез нужной страницы.
+    """
+
+    def __init__(self, query):
+        self.match = build_match_query(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(COUNT_SQL, (self.match,))
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not self.match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SEARCH_SQL,
+                (self.match, page.stop - page.start, page.start)
+            )
+            rows = cursor.fetchall()
+        found = News.objects.in_bulk([row[0] for row in rows])
+        results = []
+        for pk, title, snippet in rows:
+            news = found.get(pk)
+            if news is None:
+                continue
+            news.title_highlight = highlight(title)
+            news.snippet = highlight(snippet)
+            results.append(news)
+        return results
@@ -0,0 +1,39 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from yanews.metrics import Counter
+
+from .models import Comment, News
+
+COMMENT_WRITES = Counter(
+    'comment_writes_total', 'Записи комментариев по действиям.', ('action',)
+)
+
+
+def touch_news(news_id, comment_delta=0):
+    """
+    Отмечаем изменение новости и её комментариев.
+
+    Счётчик комментариев меняется атомарно на стороне базы. Новое
+    время изменения и счётчик входят в ключ закэшированного блока
+    новости на главной, поэтому старый блок не найдётся ни в одном
+    воркере.
+    """
+    News.objects.filter(pk=news_id).update(
+        comment_count=F('comment_count') + comment_delta,
+        updated=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    COMMENT_WRITES.inc(action='create' if created else 'update')
+    touch_news(instance.news_id, 1 if created else 0)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    COMMENT_WRITES.inc(action='delete')
+    touch_news(instance.news_id, -1)
@@ -0,0 +1,222 @@
+import gzip
+import json
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import chain
+
+from django.core.serializers.jsonl import Serializer
+from django.core.serializers.python import Deserializer
+from django.db import connections, reset_queries, transaction
+from django.utils import timezone
+
+READ_CHUNK_SIZE = 64 * 1024
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+WHITESPACE = ' \t\r\n'
+SEPARATORS = re.compile(r'[ \t\r\n,]*')
+
+_kept = ContextVar('kept_timestamps', default=False)
+
+
+def open_stream(path, mode='rt'):
+    """Открываем файл данных, сжатые gzip файлы распознаём по .gz."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def iter_json_array(stream, buffer=''):
+    """
+    Разбираем элементы JSON-массива по одному, читая файл частями.
+
+    Разобранные элементы не вырезаются из буфера, а пропускаются
+    по смещению; буфер сжимается только перед очередным чтением.
+    Если элемент не разбирается, следующее чтение берёт столько же
+    символов, сколько уже ждёт разбора, поэтому длинный элемент
+    разбирается за линейное время. Буфер не растёт больше
+    MAX_RECORD_SIZE: повреждённый файл не читается в память целиком.
+    """
+    decoder = json.JSONDecoder()
+    position = 0
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            buffer = buffer[position:]
+            position = 0
+            if len(buffer) > MAX_RECORD_SIZE:
+                raise ValueError(
+                    f'Элемент JSON-массива не разобран в пределах '
+                    f'{MAX_RECORD_SIZE} символов: {error}'
+                ) from error
+            wanted = min(len(buffer), MAX_RECORD_SIZE - len(buffer))
+            chunk = stream.read(max(READ_CHUNK_SIZE, wanted))
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+        yield record
+
+
+def iter_json_lines(lines):
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_records(stream):
+    """
+    Записи в формате фикстур Django из JSON Lines или JSON-массива.
+
+    Формат определяем по первому значащему символу файла.
+    """
+    first = stream.read(1)
+    while first and first in WHITESPACE:
+        first = stream.read(1)
+    if first == '[':
+        return iter_json_array(stream)
+    return iter_json_lines(chain([first + stream.readline()], stream))
+
+
+def timestamps_kept():
+    """Сохраняются ли в текущем контексте даты из файла."""
+    return _kept.get()
+
+
+@contextmanager
+def kept_timestamps():
+    """
+    Внутри блока поля с keeps_timestamps не заменяют даты текущим временем.
+
+    Флаг хранится в контексте, поэтому сохранения в других потоках
+    и корутинах проставляют время как обычно.
+    """
+    token = _kept.set(True)
+    try:
+        yield
+    finally:
+        _kept.reset(token)
+
+
+@contextmanager
+def keep_timestamps(model, objects):
+    """
+    Сохраняем даты из файла для полей с auto_now и auto_now_add.
+
+    bulk_create иначе перезаписал бы их текущим временем.
+    Отсутствующие в файле даты заполняем текущим временем.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        if not getattr(field, 'keeps_timestamps', False):
+            raise TypeError(
+                f'{model._meta.label}.{field.name}: даты из файла '
+                f'сохраняются только в полях с keeps_timestamps.'
+            )
+    now = timezone.now()
+    for obj in objects:
+        for field in fields:
+            if getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, now)
+    with kept_timestamps():
+        yield
+
+
+class BulkLoader:
+    """
+    Потоковая загрузка записей пачками через bulk_create.
+
+    Каждая пачка записывается в отдельной транзакции, в памяти
+    одновременно находится не больше одной пачки объектов.
+
+    Как и loaddata, загрузка идёт с отключённой проверкой внешних
+    ключей, а после последней пачки ключи загруженных таблиц
+    проверяются разом. Так запись может ссылаться на объект из
+    следующей пачки. Пачки к этому моменту уже записаны, поэтому
+    после IntegrityError висячие ссылки нужно исправить в файле
+    и загрузить его заново. Отключить проверку можно только вне
+    транзакции: внутри atomic() ключи проверяются при её фиксации.
+    """
+
+    def __init__(self, batch_size=5000, using='default', on_batch=None):
+        self.batch_size = batch_size
+        self.using = using
+        self.on_batch = on_batch
+        self.total = 0
+        self.started = None
+        self.tables = set()
+
+    def load(self, stream):
+        self.started = time.perf_counter()
+        connection = connections[self.using]
+        with connection.constraint_checks_disabled():
+            batch = defaultdict(list)
+            size = 0
+            for deserialized in Deserializer(
+                iter_records(stream), using=self.using
+            ):
+                obj = deserialized.object
+                batch[type(obj)].append(obj)
+                size += 1
+                if size >= self.batch_size:
+                    self.flush(batch)
+                    batch, size = defaultdict(list), 0
+            if size:
+                self.flush(batch)
+        connection.check_constraints(table_names=sorted(self.tables))
+        return self.total
+
+    def flush(self, batch):
+        with transaction.atomic(using=self.using):
+            for model, objects in batch.items():
+                self.tables.add(model._meta.db_table)
+                self.before_flush(model, objects)
+                with keep_timestamps(model, objects):
+                    model._default_manager.using(self.using).bulk_create(
+                        objects
+                    )
+                self.after_flush(model, objects)
+        self.total += sum(len(objects) for objects in batch.values())
+        reset_queries()
+        if self.on_batch is not None:
+            self.on_batch(self.total, self.elapsed)
+
+    def before_flush(self, model, objects):
+        """Точка расширения для подготовки объектов перед записью."""
+
+    def after_flush(self, model, objects):
+        """Точка расширения для действий после записи пачки модели."""
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def dump_queryset(queryset, stream, chunk_size=2000):
+    """
+    Пишем объекты в формате JSON Lines, читая их из базы частями.
+
+    Возвращаем число выгруженных объектов.
+    """
+    total = 0
+
+    def counted(objects):
+        nonlocal total
+        for obj in objects:
+            total += 1
+            yield obj
+
+    Serializer().serialize(
+        counted(queryset.order_by('pk').iterator(chunk_size=chunk_size)),
+        stream=stream
+    )
+    return total
@@ -1,38 +1,98 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .export import EXPORT_FORMATS, export_comments
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import KeysetPaginator
+from .search import SearchResults
 
 
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    archive = False
+    archive_ordering = ('-date', '-id')
+    cursor_param = 'cursor'
 
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        В режиме архива выводим страницу после курсора из запроса.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        queryset = self.model.objects.all()
+        if not self.archive:
+            return queryset[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        paginator = KeysetPaginator(
+            queryset,
+            self.archive_ordering,
+            settings.NEWS_COUNT_ON_HOME_PAGE
+        )
+        self.page = paginator.page(self.request.GET.get(self.cursor_param))
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['archive'] = self.archive
+        context['story_cache_timeout'] = settings.NEWS_STORY_CACHE_TIMEOUT
+        context['story_cache_version'] = settings.NEWS_STORY_CACHE_VERSION
+        if self.archive:
+            context['next_cursor'] = self.page.next_cursor
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """Полнотекстовый поиск по заголовкам и текстам новостей."""
+    template_name = 'news/search.html'
+    context_object_name = 'results'
+
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+    def get_queryset(self):
+        return SearchResults(self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+def comments_paginator(news):
+    """Комментарии новости по курсору, в порядке их создания."""
+    return KeysetPaginator(
+        Comment.objects.filter(news=news).select_related('author'),
+        ('created', 'id'),
+        settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    )
+
+
+class CommentsPageMixin:
+    """Добавляет в контекст первую страницу комментариев новости."""
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = comments_paginator(self.object).page()
+        context['comments'] = page.object_list
+        context['next_cursor'] = page.next_cursor
+        return context
 
-class NewsDetail(generic.DetailView):
+
+class NewsDetail(CommentsPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
+        obj = get_object_or_404(self.model, pk=self.kwargs['pk'])
         return obj
 
     def get_context_data(self, **kwargs):
@@ -42,8 +102,53 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class NewsComments(generic.ListView):
+    """
+    Следующие страницы комментариев новости.
+
+    Отдаём HTML-фрагмент или JSON, если передан параметр format=json.
+    """
+    template_name = 'news/comments.html'
+    context_object_name = 'comments'
+    cursor_param = 'cursor'
+
+    def get_queryset(self):
+        self.news = get_object_or_404(
+            News.objects.only('pk'), pk=self.kwargs['pk']
+        )
+        self.page = comments_paginator(self.news).page(
+            self.request.GET.get(self.cursor_param)
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['news'] = self.news
+        context['next_cursor'] = self.page.next_cursor
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        user = self.request.user
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': str(comment.author),
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                    'is_author': comment.author_id == user.pk,
+                }
+                for comment in context['comments']
+            ],
+            'next_cursor': context['next_cursor'],
+        })
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -63,12 +168,41 @@ class NewsComment(
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
+
+
+def news_updated(request, pk):
+    """
+    Время последнего изменения новости для ETag условного GET.
+
+    Один лёгкий запрос на запрос страницы, до загрузки комментариев.
+    Страница авторизованного пользователя содержит форму и его ссылки,
+    поэтому для него проверка не выполняется.
+    """
+    if request.user.is_authenticated:
+        return None
+    if not hasattr(request, '_news_updated'):
+        request._news_updated = News.objects.filter(
+            pk=pk
+        ).values_list('updated', flat=True).first()
+    return request._news_updated
+
+
+def news_etag(request, pk):
+    updated = news_updated(request, pk)
+    if updated is None:
+        return None
+    return f'news-{pk}-{updated.timestamp()}'
 
 
 class NewsDetailView(generic.View):
 
+    # Только ETag: у Last-Modified точность в секунду, и комментарий,
+    # добавленный в ту же секунду, что и прошлая загрузка, клиент
+    # с одним If-Modified-Since не увидел бы.
+    @method_decorator(condition(etag_func=news_etag))
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
         return view(request, *args, **kwargs)
@@ -83,14 +217,15 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +237,20 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class CommentsExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех комментариев пользователя zip-архивом."""
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'json')
+        if export_format not in EXPORT_FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        response = StreamingHttpResponse(
+            export_comments(request.user, export_format),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="comments-{export_format}.zip"'
+        )
+        return response
@@ -0,0 +1,81 @@
+"""Выгрузка данных zip-архивом, который отдаётся по частям."""
+import csv
+import json
+import zipfile
+from io import StringIO
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class StreamBuffer:
+    """Файлоподобный приёмник, из которого забираем записанные байты."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def chunked(rows, chunk_size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def json_chunks(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """JSON-массив строк по частям, по одной пачке строк за раз."""
+    yield '['
+    separator = ''
+    for chunk in chunked(rows, chunk_size):
+        yield separator + ','.join(
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+            for row in chunk
+        )
+        separator = ','
+    yield ']'
+
+
+def csv_chunks(rows, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """CSV с заголовком по частям, по одной пачке строк за раз."""
+    output = StringIO()
+    writer = csv.DictWriter(output, fieldnames=fields)
+    writer.writeheader()
+    for chunk in chunked(rows, chunk_size):
+        writer.writerows(chunk)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+    yield output.getvalue()
+
+
+def stream_zip(files):
+    """
+    Zip-архив по частям из пар (имя файла, части текста).
+
+    zipfile умеет писать в поток без перемотки, поэтому архив
+    отдаётся клиенту по мере чтения данных из базы.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in files:
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk.encode())
+                    yield buffer.pop()
+    yield buffer.pop()
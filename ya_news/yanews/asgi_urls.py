@@ -0,0 +1,38 @@
+import asyncio
+
+from django.conf import settings
+from django.urls import include, path
+
+from . import urls
+
+urlpatterns = [
+    path('', include('news.async_urls'))
+    if getattr(pattern, 'app_name', None) == 'news' else pattern
+    for pattern in urls.urlpatterns
+]
+
+
+class AsyncURLConfMiddleware:
+    """
+    Под ASGI разрешаем адреса по settings.ASGI_URLCONF.
+
+    Так асинхронные представления работают только там, где есть цикл
+    событий, а WSGI продолжает вызывать синхронные напрямую.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if settings.ASGI_URLCONF:
+            request.urlconf = settings.ASGI_URLCONF
+        return await self.get_response(request)
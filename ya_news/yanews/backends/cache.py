@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.core.cache.backends import filebased, locmem
+
+from yanews.metrics import CACHE_REQUESTS
+
+MISSING = object()
+
+
+class CountingMixin:
+    """Считаем попадания и промахи чтений из кэша."""
+    metrics_name = 'default'
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        CACHE_REQUESTS.inc(
+            cache=self.metrics_name,
+            result='miss' if value is MISSING else 'hit'
+        )
+        return default if value is MISSING else value
+
+
+class LocMemCache(CountingMixin, locmem.LocMemCache):
+    """Кэш в памяти процесса."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.metrics_name = name or 'default'
+
+
+class FileBasedCache(CountingMixin, filebased.FileBasedCache):
+    """
+    Кэш в файлах, общий для всех процессов хоста.
+
+    В метриках называется по последнему каталогу LOCATION.
+    """
+
+    def __init__(self, directory, params):
+        super().__init__(directory, params)
+        self.metrics_name = Path(directory).name
@@ -0,0 +1,119 @@
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+STICKY_COOKIE = 'primary_reads'
+
+_routing = ContextVar('routing', default=None)
+
+
+class RoutingState:
+    """
+    Куда читать внутри текущего запроса.
+
+    Реплика выбирается один раз на запрос: иначе список и детали
+    на одной странице могли бы прийти с реплик с разным отставанием.
+    """
+
+    def __init__(self):
+        self.replica = False
+        self.wrote = False
+        self.database = random.choice(settings.DATABASE_REPLICAS)
+
+
+def primary_is_sticky(request):
+    """Пользователь недавно писал в базу и должен читать из основной."""
+    return STICKY_COOKIE in request.COOKIES
+
+
+class ReplicaRouter:
+    """
+    Чтение моделей из REPLICA_APPS на реплике, выбранной для запроса.
+
+    Реплика используется только в запросах, которым её разрешила
+    ReplicaMiddleware; всё остальное, включая любую запись,
+    идёт в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if (
+            state is not None and state.replica
+            and model._meta.app_label in settings.REPLICA_APPS
+        ):
+            return state.database
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.replica = False
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Все базы содержат одни и те же данные."""
+        return True
+
+
+class ReplicaMiddleware:
+    """
+    Разрешаем чтение с реплики безопасным запросам к REPLICA_VIEWS.
+
+    После записи пользователь REPLICA_STICKY_SECONDS читает
+    из основной базы, чтобы сразу увидеть свои изменения,
+    даже если реплика отстаёт. Отметка хранится в cookie, а не в сессии:
+    так она не добавляет запросов к базе ни при записи, ни при чтении.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.mark_sticky(state, response)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.mark_sticky(state, response)
+
+    def mark_sticky(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _routing.get()
+        if state is not None:
+            state.replica = (
+                request.method in ('GET', 'HEAD')
+                and request.resolver_match.view_name in settings.REPLICA_VIEWS
+                and not primary_is_sticky(request)
+            )
@@ -0,0 +1,327 @@
+"""
+Метрики в формате Prometheus, общие для всех процессов хоста.
+
+Каждый процесс пишет значения в свой файл METRICS_DIR/<pid>.db,
+отображённый в память, а /metrics суммирует файлы всех процессов.
+Поэтому любой воркер gunicorn отдаёт итоги по хосту. Мастер gunicorn
+очищает каталог при старте (clear в gunicorn.conf.py), иначе счётчики
+продолжатся с прошлых значений.
+"""
+import asyncio
+import ipaddress
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10
+)
+
+REGISTRY = {}
+
+_lock = threading.Lock()
+_store = None
+
+
+def read_entries(data, used):
+    """Записи файла: ключ, значение и смещение значения."""
+    position = 8
+    while position < used:
+        (length,) = struct.unpack_from('i', data, position)
+        key = bytes(data[position + 4:position + 4 + length]).decode()
+        position += (4 + length + 7) // 8 * 8
+        (value,) = struct.unpack_from('d', data, position)
+        yield key, value, position
+        position += 8
+
+
+class MmapStore:
+    """
+    Значения метрик одного процесса в файле, отображённом в память.
+
+    Файл начинается с 8 байт занятой длины, за ними идут записи:
+    длина ключа, ключ в UTF-8 с выравниванием до 8 байт и значение
+    double. Запись сначала пишется целиком и лишь потом учитывается
+    в длине, поэтому читатели не видят её наполовину.
+    """
+    INITIAL_SIZE = 1 << 16
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = struct.unpack_from('Q', self._map, 0)[0] or 8
+        self._positions = {
+            key: position
+            for key, _, position in read_entries(self._map, self._used)
+        }
+
+    def add(self, key, amount):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        (value,) = struct.unpack_from('d', self._map, position)
+        struct.pack_into('d', self._map, position, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padded = (4 + len(encoded) + 7) // 8 * 8
+        entry = struct.pack(
+            f'i{padded - 4}sd', len(encoded), encoded, 0.0
+        )
+        while self._used + len(entry) > len(self._map):
+            size = len(self._map) * 2
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        self._map[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        struct.pack_into('Q', self._map, 0, self._used)
+        self._positions[key] = self._used - 8
+        return self._used - 8
+
+
+def current_store():
+    """
+    Файл текущего процесса.
+
+    После fork у дочернего процесса другой pid, и он открывает свой файл,
+    а не пишет в файл родителя.
+    """
+    global _store
+    directory = settings.METRICS_DIR
+    pid = os.getpid()
+    if _store is None or _store[:2] != (pid, directory):
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        _store = (pid, directory, MmapStore(Path(directory) / f'{pid}.db'))
+    return _store[2]
+
+
+def clear(directory):
+    """Удаляем файлы метрик прошлого запуска сервиса."""
+    global _store
+    with _lock:
+        if _store is not None and Path(_store[1]) == Path(directory):
+            _store = None
+        for path in Path(directory).glob('*.db'):
+            path.unlink()
+
+
+def add(*updates):
+    """Прибавляем значения по ключам записей: пары (ключ, приращение)."""
+    with _lock:
+        store = current_store()
+        for key, amount in updates:
+            store.add(key, amount)
+
+
+def collect(directory):
+    """Сумма значений по файлам всех процессов."""
+    totals = defaultdict(float)
+    for path in Path(directory).glob('*.db'):
+        data = path.read_bytes()
+        if len(data) < 8:
+            continue
+        (used,) = struct.unpack_from('Q', data, 0)
+        for key, value, _ in read_entries(data, used):
+            sample, labels = json.loads(key)
+            totals[sample, tuple(map(tuple, labels))] += value
+    return totals
+
+
+def format_sample(sample, labels, value):
+    if labels:
+        pairs = ','.join(
+            '{}="{}"'.format(name, str(label).replace('\\', r'\\')
+                             .replace('\n', r'\n').replace('"', r'\"'))
+            for name, label in labels
+        )
+        sample = f'{sample}{{{pairs}}}'
+    return f'{sample} {float(value)!r}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        REGISTRY[name] = self
+
+    def key(self, sample, labels, *extra):
+        """
+        Ключ записи в файле.
+
+        Кодирование в JSON дороже самой записи, поэтому ключ строится
+        один раз для каждого набора меток.
+        """
+        values = tuple(labels[name] for name in self.labelnames) + extra
+        key = self._keys.get((sample, values))
+        if key is None:
+            names = self.labelnames + ('le',) * len(extra)
+            key = self._keys[sample, values] = json.dumps(
+                [sample, [[name, str(value)] for name, value
+                          in zip(names, values)]],
+                ensure_ascii=False
+            )
+        return key
+
+    def samples(self, totals):
+        return [
+            (sample, labels, value)
+            for (sample, labels), value in sorted(totals.items())
+            if sample == self.name
+        ]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        add((self.key(self.name, labels), amount))
+
+
+class Histogram(Metric):
+    """
+    Гистограмма: в файле хранится число значений в каждом интервале,
+    накопленные значения бакетов считаются при выдаче.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        index = bisect_left(self.buckets, value)
+        bound = self.buckets[index] if index < len(self.buckets) else '+Inf'
+        add(
+            (self.key(f'{self.name}_bucket', labels, bound), 1),
+            (self.key(f'{self.name}_sum', labels), value),
+            (self.key(f'{self.name}_count', labels), 1),
+        )
+
+    def samples(self, totals):
+        counts = defaultdict(dict)
+        totals_samples = []
+        for (sample, labels), value in sorted(totals.items()):
+            if sample == f'{self.name}_bucket':
+                counts[labels[:-1]][labels[-1][1]] = value
+            elif sample in (f'{self.name}_sum', f'{self.name}_count'):
+                totals_samples.append((sample, labels, value))
+        samples = []
+        for labels, values in counts.items():
+            cumulative = 0
+            for bound in [*map(str, self.buckets), '+Inf']:
+                cumulative += values.get(bound, 0)
+                samples.append((
+                    f'{self.name}_bucket', labels + (('le', bound),),
+                    cumulative
+                ))
+        return samples + totals_samples
+
+
+def render(directory):
+    """Текст для Prometheus по всем процессам хоста."""
+    totals = collect(directory)
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        lines.extend(
+            format_sample(*sample) for sample in metric.samples(totals)
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def client_allowed(request):
+    """Клиент из сети settings.METRICS_ALLOWED_NETWORKS."""
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics(request):
+    if not client_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(settings.METRICS_DIR), content_type=CONTENT_TYPE
+    )
+
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP-запросы по маршруту, методу и статусу.',
+    ('view', 'method', 'status')
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'Время HTTP-запросов по маршрутам.',
+    ('view',)
+)
+DB_QUERIES = Counter(
+    'db_queries_total', 'SQL-запросы по маршрутам.', ('view',)
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Чтения из кэша: попадания и промахи.',
+    ('cache', 'result')
+)
+
+
+class MetricsMiddleware:
+    """
+    Считаем запросы, их время и SQL-запросы по именам маршрутов.
+
+    Число SQL-запросов берётся из request.server_timing, который
+    заполняет ServerTimingMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        REQUESTS.inc(
+            view=view, method=request.method, status=response.status_code
+        )
+        LATENCY.observe(elapsed, view=view)
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            DB_QUERIES.inc(timing.queries, view=view)
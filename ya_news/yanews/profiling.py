@@ -0,0 +1,141 @@
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+PROFILE_SUFFIX = '.prof'
+SALT = __name__
+
+logger = logging.getLogger(__name__)
+
+
+def profile_token():
+    """Значение заголовка PROFILING_HEADER для профилирования запроса."""
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def has_valid_token(request):
+    header = 'HTTP_' + settings.PROFILING_HEADER.upper().replace('-', '_')
+    token = request.META.get(header)
+    if token is None:
+        return False
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def is_sampled(request):
+    rate = settings.PROFILING_SAMPLE_RATE
+    return (rate and random.random() < rate) or has_valid_token(request)
+
+
+def profile_path(directory, view_name):
+    """Имя файла: маршрут, время и процесс, например news.detail.<...>."""
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+    name = view_name.replace(':', '.')
+    return Path(directory) / f'{name}.{stamp}.{os.getpid()}{PROFILE_SUFFIX}'
+
+
+def view_name_of(path):
+    """
+    Имя маршрута по имени файла профиля.
+
+    Точки снова становятся двоеточиями, в том числе для вложенных
+    пространств имён вроде a:b:view.
+    """
+    name = path.name[:-len(PROFILE_SUFFIX)].rsplit('.', 2)[0]
+    return name.replace('.', ':')
+
+
+def save_profile(profiler, view_name):
+    """
+    Сохраняем профиль и удаляем самые старые сверх PROFILING_MAX_FILES.
+
+    Файл пишется под временным именем и переименовывается, чтобы отчёт
+    не прочитал его наполовину записанным.
+    """
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = profile_path(directory, view_name)
+    temporary = path.with_suffix('.tmp')
+    profiler.dump_stats(temporary)
+    os.replace(temporary, path)
+    profiles = sorted(
+        directory.glob(f'*{PROFILE_SUFFIX}'),
+        key=lambda profile: profile.stat().st_mtime
+    )
+    for old in profiles[:-settings.PROFILING_MAX_FILES]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def collect_profiles(directory):
+    """Файлы профилей из каталога, сгруппированные по именам маршрутов."""
+    profiles = defaultdict(list)
+    for path in sorted(Path(directory).glob(f'*{PROFILE_SUFFIX}')):
+        profiles[view_name_of(path)].append(path)
+    return profiles
+
+
+def profile_report(paths, top, sort):
+    """Сводка нескольких профилей: top самых дорогих функций."""
+    stream = io.StringIO()
+    stats = pstats.Stats(*map(str, paths), stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    Профилируем cProfile выборку запросов.
+
+    Профилируется доля PROFILING_SAMPLE_RATE случайных запросов и запросы
+    с подписанным заголовком PROFILING_HEADER (см. profile_token). Запрос
+    вне выборки стоит одного вызова random() и поиска заголовка.
+
+    Под ASGI запросы не профилируются: cProfile видит только свой поток,
+    а в цикле событий одновременно выполняются чужие запросы. Запросы
+    из выборки тогда отмечаются предупреждением в логе.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            if is_sampled(request):
+                logger.warning(
+                    'Запрос %s не профилируется: под ASGI профилирование '
+                    'отключено.', request.path
+                )
+            return self.get_response(request)
+        if not is_sampled(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        match = request.resolver_match
+        save_profile(
+            profiler, match.view_name if match is not None else 'unresolved'
+        )
+        return response
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,23 +22,51 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.profiling.ProfilingMiddleware',
+    'yanews.metrics.MetricsMiddleware',
+    'yanews.query_budget.QueryBudgetMiddleware',
+    'yanews.asgi_urls.AsyncURLConfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanews.db_router.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanews.server_timing.ServerTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
+# Под ASGI главная, архив и страница новости асинхронные. Это выгодно
+# только под ASGI: там синхронные представления идут по очереди в одном
+# потоке. WSGI с потоками их не использует и обгоняет оба варианта,
+# поэтому ASYNC_VIEWS=0 возвращает под ASGI синхронные представления.
+ASGI_URLCONF = (
+    'yanews.asgi_urls' if os.environ.get('ASYNC_VIEWS', '1') == '1' else None
+)
+# Потоков в пуле, где асинхронные представления работают с базой.
+ASYNC_ORM_THREADS = 8
+
+# Профиль шаблонов: в 'production' разобранные шаблоны кэшируются
+# в памяти процесса независимо от DEBUG (runserver всё равно сбрасывает
+# кэш при изменении файлов), в 'development' читаются при каждом рендеринге.
+TEMPLATE_PROFILE = os.environ.get('TEMPLATE_PROFILE', 'production')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -53,11 +82,74 @@ WSGI_APPLICATION = 'yanews.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yanews.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Соединение переживает запрос, а не открывается заново каждый раз.
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            # Размер кэша подготовленных выражений модуля sqlite3.
+            'cached_statements': 256,
+        },
+    },
+    # Реплика только для чтения. Локально — второй файл SQLite,
+    # который заполняет команда sync_replica.
+    'replica': {
+        'ENGINE': 'yanews.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'cached_statements': 256,
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['yanews.db_router.ReplicaRouter']
+# Псевдонимы реплик; пустой список отключает чтение с реплик.
+DATABASE_REPLICAS = []
+# Приложения, модели которых можно читать с реплики.
+REPLICA_APPS = {'news'}
+# Представления только для чтения, которые ходят на реплику.
+REPLICA_VIEWS = {'news:home', 'news:archive', 'news:detail', 'news:comments'}
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_STICKY_SECONDS = 10
+
+# PRAGMA, которые выполняются при открытии каждого соединения.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    # Отрицательное значение — размер кэша страниц в КиБ.
+    'cache_size': -16000,
+    'mmap_size': 128 * 2 ** 20,
+    'temp_store': 'MEMORY',
+}
+
+# Кэши в памяти процесса, которые считают попадания и промахи для /metrics.
+CACHES = {
+    'default': {
+        'BACKEND': 'yanews.backends.cache.LocMemCache',
+    },
+    # Отдельный кэш сессий: очистка кэша страниц не трогает их.
+    # Он общий для всех воркеров хоста: выход пользователя в одном
+    # воркере сразу закрывает сессию и в остальных. При нескольких хостах
+    # сюда нужен memcached или Redis. Записи кэша — pickle, поэтому
+    # каталог лежит в проекте, а не в общем для всех пользователей /tmp.
+    'sessions': {
+        'BACKEND': 'yanews.backends.cache.FileBasedCache',
+        'LOCATION': Path(
+            os.environ.get('SESSION_CACHE_DIR')
+            or BASE_DIR / 'cache' / 'sessions'
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
 }
 
+# Сессии читаются из кэша и пишутся ещё и в базу: при промахе кэша
+# или перезапуске процесса пользователь не разлогинивается.
+# Вариант без базы — 'django.contrib.sessions.backends.signed_cookies'.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +172,59 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+BAD_WORDS_FILE = BASE_DIR / 'news' / 'bad_words.txt'
+
+# Блоки новостей на главной кэшируются в памяти каждого процесса.
+# В ключ входят время изменения новости и число комментариев, поэтому
+# после правки любой воркер строит блок заново, не дожидаясь таймаута.
+NEWS_STORY_CACHE_TIMEOUT = 60 * 15
+NEWS_STORY_CACHE_VERSION = 1
+
+# Сколько SQL-запросов может выполнить представление за один запрос,
+# включая чтение сессии и пользователя.
+QUERY_BUDGETS = {
+    'news:home': 3,
+    'news:archive': 3,
+    'news:search': 5,
+    'news:detail': 5,
+    'news:comments': 4,
+    'news:edit': 5,
+    'news:delete': 5,
+    'news:export': 2,
+}
+QUERY_BUDGET_STRICT = False
+
+# Строка лога с разбивкой времени каждого запроса (см. Server-Timing).
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yanews.server_timing': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Каталог, где каждый процесс хранит свои метрики; общий для всех
+# воркеров хоста. Мастер gunicorn очищает его при старте (см.
+# gunicorn.conf.py). Каталог лежит в проекте: в общий /tmp другие
+# пользователи хоста могли бы подложить свои файлы метрик.
+METRICS_DIR = Path(os.environ.get('METRICS_DIR') or BASE_DIR / 'metrics')
+# Сети, из которых можно читать /metrics; по умолчанию только с хоста.
+# За обратным прокси адрес клиента — адрес прокси, поэтому прокси
+# не должен пропускать /metrics снаружи.
+METRICS_ALLOWED_NETWORKS = os.environ.get(
+    'METRICS_ALLOWED_NETWORKS', '127.0.0.0/8,::1/128'
+).split(',')
+
+# Профилирование cProfile: доля случайных запросов и запросы с подписанным
+# заголовком (значение выдаёт manage.py profile_report --token). Хранится
+# не больше PROFILING_MAX_FILES последних профилей.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_HEADER = 'X-Profile'
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_FILES = 500
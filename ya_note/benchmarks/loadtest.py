@@ -0,0 +1,152 @@
+"""
+Нагрузочный тест YaNote: задержки p50/p95/p99 по именам маршрутов в JSON.
+
+Приложение yanote.wsgi работает в процессе или на локальном порту
+(--port-mode) с синтетическими данными во временной базе.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.loadtest --workers 8 --duration 10 -o load.json
+    python -m benchmarks.loadtest --scenarios crud --workers 4 --processes
+"""
+import argparse
+import json
+import sys
+import tempfile
+from functools import partial
+from importlib import import_module
+from pathlib import Path
+
+from .load import HTTPTransport, InProcessTransport, run_load, serve, summarize
+from .utils import setup_django
+
+
+def browse(client, data, rng):
+    """Пользователь открывает главную, список и одну из своих заметок."""
+    from django.urls import reverse
+
+    client.get(reverse('notes:home'))
+    client.get(reverse('notes:list'))
+    slug = rng.choice(data['notes'][client.user])
+    client.get(reverse('notes:detail', args=(slug,)))
+
+
+def crud(client, data, rng):
+    """Пользователь создаёт, читает, правит и удаляет заметку."""
+    from django.urls import reverse
+
+    slug = f'load-{client.user}-{rng.getrandbits(48):x}'
+    note = {'title': 'Заметка под нагрузкой', 'text': 'Текст', 'slug': slug}
+    client.get(reverse('notes:add'))
+    client.post(reverse('notes:add'), note)
+    client.get(reverse('notes:detail', args=(slug,)))
+    client.post(
+        reverse('notes:edit', args=(slug,)), {**note, 'text': 'Новый текст'}
+    )
+    client.get(reverse('notes:list'))
+    client.post(reverse('notes:delete', args=(slug,)))
+
+
+SCENARIOS = {
+    'browse': (browse, True),
+    'crud': (crud, True),
+}
+
+
+def seed(notes_per_user, users):
+    """Заполняем базу и заранее создаём сессии пользователей."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model, login
+    from django.http import HttpRequest
+
+    from notes.models import Note
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{index}') for index in range(users)
+    )
+    authors = list(User.objects.order_by('pk'))
+    notes = [
+        [f'user{user}-note{index}' for index in range(notes_per_user)]
+        for user in range(users)
+    ]
+    Note.objects.bulk_create(
+        (
+            Note(title=f'Заметка {slug}', text='Текст', slug=slug,
+                 author=author)
+            for author, slugs in zip(authors, notes)
+            for slug in slugs
+        ),
+        batch_size=5000
+    )
+    engine = import_module(settings.SESSION_ENGINE)
+    sessions = []
+    for author in authors:
+        request = HttpRequest()
+        request.session = engine.SessionStore()
+        login(request, author, 'django.contrib.auth.backends.ModelBackend')
+        request.session.save()
+        sessions.append(request.session.session_key)
+    return {
+        'notes': notes,
+        'sessions': sessions,
+        'session_cookie': settings.SESSION_COOKIE_NAME,
+    }
+
+
+def make_transport(port=None):
+    if port is not None:
+        return HTTPTransport(port)
+    from yanote.wsgi import application
+    return InProcessTransport(application)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--processes', action='store_true',
+                        help='исполнители в процессах, а не в потоках')
+    parser.add_argument('--port-mode', action='store_true',
+                        help='запросы по HTTP к серверу на локальном порту')
+    parser.add_argument('--notes', type=int, default=200,
+                        help='заметок у каждого пользователя')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='файл для JSON-отчёта')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'db.sqlite3')
+        data = seed(args.notes, args.users)
+        port = None
+        if args.port_mode:
+            from yanote.wsgi import application
+            port = serve(application).server_address[1]
+        samples, elapsed = run_load(
+            [(name, SCENARIOS[name]) for name in args.scenarios],
+            partial(make_transport, port), data,
+            args.workers, args.duration, args.processes, args.seed
+        )
+    report = {
+        'app': 'ya_note',
+        'transport': 'http' if args.port_mode else 'in-process',
+        'executor': 'processes' if args.processes else 'threads',
+        'workers': args.workers,
+        'duration': args.duration,
+        'scenarios': args.scenarios,
+        **summarize(samples, elapsed),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
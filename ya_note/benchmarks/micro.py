@@ -0,0 +1,86 @@
+"""
+Микробенчмарки горячих функций YaNote с проверкой по базовой линии.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.micro                    # сравнить с baseline.json
+    python -m benchmarks.micro --threshold 0.1 -o micro.json
+    python -m benchmarks.micro --update-baseline  # записать новую линию
+"""
+from .templates import view_context
+from .utils import run_micro
+
+TITLE = 'Очень важная заметка о планах на следующую неделю'
+
+CASES = {}
+
+
+def case(number):
+    """Регистрируем подготовку случая и число вызовов в повторении."""
+    def register(setup):
+        CASES[setup.__name__] = (setup, number)
+        return setup
+    return register
+
+
+def author_with_notes(count):
+    """Автор и count заметок с одинаковым заголовком TITLE."""
+    from django.contrib.auth import get_user_model
+
+    from notes.models import Note
+    from notes.slugs import allocate_slugs
+
+    author, created = get_user_model().objects.get_or_create(
+        username='Автор'
+    )
+    if created:
+        titles = [TITLE] * count
+        Note.objects.bulk_create(
+            Note(title=TITLE, text='Текст', slug=slug, author=author)
+            for slug in allocate_slugs(Note.objects.all(), titles)
+        )
+    return author
+
+
+@case(number=1000)
+def slugify():
+    from pytils.translit import slugify
+
+    return lambda: slugify(TITLE)
+
+
+@case(number=200)
+def allocate_slug():
+    """Подбор свободного slug при Note.save, когда заголовок уже занят."""
+    from notes.models import Note
+    from notes.slugs import allocate_slug
+
+    author_with_notes(100)
+    return lambda: allocate_slug(Note.objects.all(), TITLE)
+
+
+@case(number=200)
+def clean_slug():
+    from notes.forms import NoteForm
+
+    author_with_notes(100)
+    form = NoteForm()
+    form.cleaned_data = {'slug': 'svobodnyiy-slug'}
+    return form.clean_slug
+
+
+@case(number=20)
+def render_list():
+    from django.template.loader import get_template
+    from django.test import RequestFactory
+
+    from notes.views import NotesList
+
+    request = RequestFactory().get('/')
+    request.user = author_with_notes(100)
+    name, context = view_context(NotesList, request)
+    template = get_template(name)
+    return lambda: template.render(context, request)
+
+
+if __name__ == '__main__':
+    run_micro(CASES, __doc__)
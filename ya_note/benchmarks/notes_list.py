@@ -0,0 +1,77 @@
+"""
+Память и время на страницу списка заметок пользователя.
+
+Сравниваем загрузку всех заметок со всеми полями и страницу
+по курсору с загрузкой только нужных списку полей.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.notes_list --notes 50000
+"""
+import argparse
+import time
+import tracemalloc
+
+from .utils import setup_django
+
+BATCH_SIZE = 5000
+
+
+def profile(func):
+    """Время и пик выделенной памяти при выполнении функции."""
+    func()
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=50_000)
+    parser.add_argument('--text-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from notes.models import Note
+    from notes.pagination import KeysetPaginator
+    from notes.views import NotesList
+
+    author = get_user_model().objects.create(username='Автор')
+    text = 'x' * args.text_size
+    for start in range(0, args.notes, BATCH_SIZE):
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text=text,
+                 slug=f'note-{index}', author=author)
+            for index in range(start, min(start + BATCH_SIZE, args.notes))
+        )
+    queryset = Note.objects.filter(author=author)
+    paginator = KeysetPaginator(
+        queryset.only('id', 'slug', 'title'),
+        NotesList.ordering,
+        settings.NOTES_COUNT_ON_PAGE
+    )
+    deep_cursor = paginator.encode_cursor(
+        paginator.queryset[args.notes - settings.NOTES_COUNT_ON_PAGE - 1]
+    )
+    cases = (
+        ('все заметки, все поля', lambda: list(queryset.all())),
+        ('курсор, первая страница', lambda: paginator.page()),
+        ('курсор, последняя страница', lambda: paginator.page(deep_cursor)),
+    )
+    print(f'Заметок у пользователя: {args.notes}')
+    for name, func in cases:
+        elapsed, peak = profile(func)
+        print(
+            f'{name:<28} {elapsed * 1000:9.1f} мс '
+            f'{peak / 2 ** 20:9.2f} МБ'
+        )
+
+
+if __name__ == '__main__':
+    main()
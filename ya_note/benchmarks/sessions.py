@@ -0,0 +1,59 @@
+"""
+Задержка запроса авторизованного пользователя с разными движками сессий.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.sessions --repeat 200
+"""
+import argparse
+
+from .utils import measure, setup_django
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from notes.models import Note
+    from yanote.query_budget import count_queries
+
+    author = get_user_model().objects.create(username='Автор')
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст', slug=f'note-{index}',
+             author=author)
+        for index in range(args.notes)
+    )
+    url = reverse('notes:list')
+    for engine in ENGINES:
+        with override_settings(SESSION_ENGINE=engine):
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(author)
+            with count_queries() as counter:
+                client.get(url)
+            elapsed = measure(lambda: client.get(url), repeat=args.repeat)
+            login = measure(
+                lambda: client.force_login(author), repeat=args.repeat
+            )
+        print(
+            f'{engine.rsplit(".", 1)[-1]:<15} '
+            f'запрос {elapsed * 1000:8.3f} мс '
+            f'(запросов к базе: {counter.count}), '
+            f'вход {login * 1000:6.3f} мс'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Рендеринг шаблонов с кэширующим загрузчиком и без него.
+
+Контекст берётся из настоящих представлений, поэтому время включает
+и разбор шаблонов (без кэша), и сам рендеринг.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.templates --repeat 200
+"""
+import argparse
+
+from .utils import measure, setup_django
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+PROFILES = (
+    ('development', LOADERS),
+    ('production', [('django.template.loaders.cached.Loader', LOADERS)]),
+)
+
+
+def make_backend(loaders):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    config = settings.TEMPLATES[0]
+    return DjangoTemplates({
+        'NAME': 'benchmark',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {**config['OPTIONS'], 'loaders': loaders},
+    })
+
+
+def view_context(view, request, **kwargs):
+    """Имя шаблона и контекст ответа представления без рендеринга."""
+    response = view.as_view()(request, **kwargs)
+    return response.template_name[0], response.context_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import RequestFactory
+
+    from notes.models import Note
+    from notes.views import NotesList
+
+    author = get_user_model().objects.create(username='Автор')
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст', slug=f'note-{index}',
+             author=author)
+        for index in range(args.notes)
+    )
+    request = RequestFactory().get('/')
+    request.user = author
+    pages = (view_context(NotesList, request),)
+    for profile, loaders in PROFILES:
+        backend = make_backend(loaders)
+        for name, context in pages:
+            elapsed = measure(
+                lambda: backend.get_template(name).render(context, request),
+                repeat=args.repeat
+            )
+            print(f'{profile:<12} {name:<18} {elapsed * 1000:8.3f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import atexit
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASELINE = Path(__file__).with_name('baseline.json')
+# Вызовов калибровочной нагрузки в каждом повторении.
+CALIBRATION_NUMBER = 100
+
+
+def setup_django(database_name=None):
+    """
+    Настраиваем Django и создаём чистую тестовую базу.
+
+    По умолчанию база создаётся в памяти; database_name задаёт файл.
+    Отладка выключается, чтобы не копить текст запросов, а строки
+    лога Server-Timing — чтобы не печатать их на каждый запрос.
+    Кэш сессий и метрики живут во временном каталоге запуска,
+    а не в общих каталогах сервиса.
+    """
+    scratch = Path(tempfile.mkdtemp(prefix='yanote-bench-'))
+    atexit.register(shutil.rmtree, scratch, ignore_errors=True)
+    os.environ.setdefault('SESSION_CACHE_DIR', str(scratch / 'sessions'))
+    os.environ.setdefault('METRICS_DIR', str(scratch / 'metrics'))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    import django
+    from django.conf import settings
+    django.setup()
+    settings.DEBUG = False
+    logging.getLogger('yanote.server_timing').setLevel(logging.WARNING)
+    from django.db import connection
+    if database_name is not None:
+        connection.settings_dict['TEST']['NAME'] = str(database_name)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def measure(func, repeat=20, warmup=3):
+    """Медианное время выполнения функции в секундах."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def calibration():
+    """
+    Постоянная нагрузка на интерпретатор: мерило скорости машины.
+
+    Строки, словарь и сортировка, как в шаблонах и проверке текста.
+    """
+    words = [f'слово{index}' for index in range(200)]
+
+    def work():
+        table = {}
+        for word in words:
+            table[word] = word.upper().split('О')
+        sorted(table, key=len)
+    return work
+
+
+def batch_time(func, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number
+
+
+def time_call(func, number, repeat=20, warmup=3):
+    """
+    Время одного вызова функции в микросекундах.
+
+    Каждое повторение выполняет функцию number раз подряд, чтобы
+    короткие вызовы не тонули в точности таймера. Перед каждым
+    повторением так же замеряется калибровочная нагрузка, и relative —
+    медиана отношений времени функции к ней: соседние замеры одинаково
+    зависят от скорости машины и её колебаний во время запуска.
+    """
+    reference = calibration()
+    for _ in range(warmup):
+        func()
+        reference()
+    timings, ratios = [], []
+    for _ in range(repeat):
+        scale = batch_time(reference, CALIBRATION_NUMBER)
+        elapsed = batch_time(func, number)
+        timings.append(elapsed * 1e6)
+        ratios.append(elapsed / scale)
+    return {
+        'median_us': round(statistics.median(timings), 3),
+        'min_us': round(min(timings), 3),
+        'stdev_us': round(statistics.stdev(timings), 3),
+        'relative': round(statistics.median(ratios), 4),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def host_info():
+    """Машина и интерпретатор, на которых сняты результаты."""
+    return {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+    }
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    Добавляем к результатам отношение к базовой линии.
+
+    Сравниваются времена в единицах калибровки (relative), поэтому
+    линию, снятую на другой машине, можно сравнивать с текущей.
+    Возвращаем имена случаев, относительное время которых выросло
+    больше, чем в 1 + threshold раз.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]['relative']
+        result['baseline_relative'] = base
+        result['ratio'] = round(result['relative'] / base, 3)
+        if result['ratio'] > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def run_micro(cases, description):
+    """
+    Командная строка набора микробенчмарков.
+
+    cases — словарь «имя: (подготовка, number)»; подготовка создаёт
+    данные и возвращает измеряемую функцию без аргументов.
+    """
+    parser = argparse.ArgumentParser(
+        description=description,
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('cases', nargs='*',
+                        help=f'по умолчанию все: {", ".join(cases)}')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='допустимое замедление, доля от базовой линии')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='записать результаты в базовую линию')
+    parser.add_argument('-o', '--output', type=Path,
+                        help='файл для JSON-результатов')
+    args = parser.parse_args()
+    unknown = set(args.cases) - set(cases)
+    if unknown:
+        parser.error(f'неизвестные случаи: {", ".join(sorted(unknown))}')
+
+    setup_django()
+    results = {}
+    for name in args.cases or cases:
+        setup, number = cases[name]
+        results[name] = time_call(
+            setup(), number, repeat=args.repeat, warmup=args.warmup
+        )
+    report = {
+        'host': host_info(),
+        'threshold': args.threshold,
+        'cases': results,
+        'regressions': [],
+    }
+    if args.baseline.exists() and not args.update_baseline:
+        baseline = json.loads(args.baseline.read_text())
+        report['baseline_host'] = baseline['host']
+        report['regressions'] = compare_with_baseline(
+            results, baseline['cases'], args.threshold
+        )
+    output = json.dumps(report, ensure_ascii=False, indent=2) + '\n'
+    if args.update_baseline:
+        args.baseline.write_text(output)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        sys.stdout.write(output)
+    if report['regressions']:
+        sys.exit(
+            'Замедлились относительно базовой линии: '
+            f'{", ".join(report["regressions"])}'
+        )
@@ -0,0 +1,19 @@
+from copy import deepcopy
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def run_dirs(tmp_path_factory):
+    """Кэш сессий и метрики каждого запуска тестов — в своих каталогах."""
+    cache_settings = deepcopy(settings.CACHES)
+    cache_settings['sessions']['LOCATION'] = (
+        tmp_path_factory.mktemp('cache') / 'sessions'
+    )
+    with override_settings(
+        CACHES=cache_settings,
+        METRICS_DIR=tmp_path_factory.mktemp('metrics'),
+    ):
+        yield
@@ -0,0 +1,19 @@
+from .models import Note
+from .zipstream import (
+    EXPORT_CHUNK_SIZE, csv_chunks, json_chunks, stream_zip
+)
+
+EXPORT_FORMATS = ('json', 'csv')
+NOTE_FIELDS = ('id', 'title', 'slug', 'text')
+
+
+def export_notes(user, export_format='json', chunk_size=EXPORT_CHUNK_SIZE):
+    """Архив с заметками пользователя, читаемыми из базы частями."""
+    rows = Note.objects.filter(author=user).order_by('id').values(
+        *NOTE_FIELDS
+    ).iterator(chunk_size=chunk_size)
+    if export_format == 'csv':
+        chunks = csv_chunks(rows, NOTE_FIELDS, chunk_size)
+    else:
+        chunks = json_chunks(rows, chunk_size)
+    return stream_zip([(f'notes.{export_format}', chunks)])
@@ -1,11 +1,14 @@
-from pytils.translit import slugify
+import zipfile
 
 from django import forms
 from django.core.exceptions import ValidationError
 
+from .importing import IMPORT_EXTENSIONS, check_archive
 from .models import Note
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+IMPORT_WARNING = 'Загрузите zip-архив с .md файлами или файл .jsonl.'
+ARCHIVE_WARNING = 'Файл не похож на zip-архив.'
 
 
 class NoteForm(forms.ModelForm):
@@ -16,14 +19,52 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug оставляем пустым: свободный адрес подберёт Note.save.
+        """
+        slug = self.cleaned_data.get('slug')
         if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
+            return slug
         if Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """
+        Уникальность slug уже проверена в clean_slug.
+
+        Остальные поля формы, прошедшие проверку, проверяем как обычно.
+        """
+        exclude = [
+            field.name for field in self.instance._meta.fields
+            if field.name == 'slug' or field.name not in self.cleaned_data
+        ]
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self.add_error(None, error)
+
+
+class NoteImportForm(forms.Form):
+    """Форма загрузки файла для массового импорта заметок."""
+    file = forms.FileField(
+        label='Файл',
+        help_text='Zip-архив с .md файлами или JSON Lines (.jsonl)'
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith(IMPORT_EXTENSIONS):
+            raise ValidationError(IMPORT_WARNING)
+        if file.name.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(file) as archive:
+                    check_archive(archive)
+            except zipfile.BadZipFile:
+                raise ValidationError(ARCHIVE_WARNING)
+            file.seek(0)
+        return file
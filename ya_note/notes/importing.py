@@ -0,0 +1,206 @@
+import io
+import json
+import time
+import zipfile
+from collections import namedtuple
+from pathlib import PurePosixPath
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import SLUG_ATTEMPTS, Note
+from .signals import NOTE_WRITES
+from .slugs import SlugAllocator, slug_base
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_EXTENSIONS = ('.zip', '.jsonl')
+# Пределы для zip-архива: распакованный архив может быть
+# в тысячи раз больше загруженного файла.
+IMPORT_MAX_FILES = 10_000
+IMPORT_MAX_FILE_SIZE = 1 << 20
+IMPORT_MAX_TOTAL_SIZE = 100 << 20
+
+ImportBatch = namedtuple(
+    'ImportBatch', ('number', 'created', 'errors', 'elapsed')
+)
+
+
+def markdown_note(file_name, content):
+    """
+    Заметка из Markdown-файла.
+
+    Заголовок — первая строка вида «# Заголовок» или имя файла.
+    """
+    lines = content.lstrip('\ufeff').splitlines()
+    if lines and lines[0].startswith('# '):
+        title, lines = lines[0][2:].strip(), lines[1:]
+    else:
+        title = PurePosixPath(file_name).stem
+    max_length = Note._meta.get_field('title').max_length
+    return {'title': title[:max_length], 'text': '\n'.join(lines).strip()}
+
+
+def too_large(name):
+    return ValidationError(
+        f'Файл {name} больше {IMPORT_MAX_FILE_SIZE >> 10} КБ.'
+    )
+
+
+def check_archive(archive):
+    """
+    Файлы .md архива, если он укладывается в пределы импорта.
+
+    Размеры берутся из оглавления, поэтому архив отклоняется
+    до распаковки.
+    """
+    infos = archive.infolist()
+    if len(infos) > IMPORT_MAX_FILES:
+        raise ValidationError(
+            f'В архиве больше {IMPORT_MAX_FILES} файлов.'
+        )
+    members = [
+        info for info in infos
+        if not info.is_dir() and info.filename.lower().endswith('.md')
+    ]
+    for info in members:
+        if info.file_size > IMPORT_MAX_FILE_SIZE:
+            raise too_large(info.filename)
+    if sum(info.file_size for info in members) > IMPORT_MAX_TOTAL_SIZE:
+        raise ValidationError(
+            f'Распакованный архив больше {IMPORT_MAX_TOTAL_SIZE >> 20} МБ.'
+        )
+    return members
+
+
+def read_markdown_archive(file):
+    """Записи из zip-архива с .md файлами, по одному файлу за раз."""
+    with zipfile.ZipFile(file) as archive:
+        for info in check_archive(archive):
+            # Читаем не больше предела, даже если оглавление занижает
+            # размер файла.
+            with archive.open(info) as member:
+                data = member.read(IMPORT_MAX_FILE_SIZE + 1)
+            if len(data) > IMPORT_MAX_FILE_SIZE:
+                raise too_large(info.filename)
+            content = data.decode('utf-8', errors='replace')
+            yield info.filename, markdown_note(info.filename, content)
+
+
+def read_json_lines(file):
+    """Записи из JSON Lines: объект с title, text и необязательным slug."""
+    lines = io.TextIOWrapper(file, encoding='utf-8')
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield f'строка {number}', record
+
+
+def read_records(file, name):
+    if name.lower().endswith('.zip'):
+        return read_markdown_archive(file)
+    return read_json_lines(file)
+
+
+class NoteImporter:
+    """
+    Массовый импорт заметок пачками.
+
+    Каждая пачка проверяется без обращений к базе, slug для неё
+    подбираются одним запросом, а заметки записываются одним
+    bulk_create в отдельной транзакции.
+    """
+
+    def __init__(self, author, batch_size=IMPORT_BATCH_SIZE, on_batch=None):
+        self.author = author
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.batches = []
+
+    def run(self, records):
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.batches
+
+    def validate(self, batch):
+        notes, errors = [], []
+        for source, record in batch:
+            if not isinstance(record, dict):
+                errors.append((source, 'Некорректная запись.'))
+                continue
+            note = Note(
+                title=record.get('title') or '',
+                text=record.get('text') or '',
+                slug=record.get('slug') or '',
+                author=self.author,
+            )
+            try:
+                note.full_clean(exclude=('author',), validate_unique=False)
+            except ValidationError as error:
+                errors.append((source, ' '.join(error.messages)))
+                continue
+            notes.append((source, note))
+        return notes, errors
+
+    def assign_slugs(self, notes):
+        """Свободные slug для пачки; занятые явные slug — ошибки."""
+        max_length = Note._meta.get_field('slug').max_length
+        allocator = SlugAllocator(
+            Note.objects.all(),
+            [note.slug or slug_base(note.title, max_length)
+             for _, note in notes]
+        )
+        accepted, errors = [], []
+        for source, note in notes:
+            if not note.slug:
+                continue
+            if note.slug in allocator.taken:
+                errors.append((source, f'slug {note.slug} уже занят.'))
+                continue
+            allocator.taken.add(note.slug)
+            accepted.append(note)
+        for _, note in notes:
+            if not note.slug:
+                note.slug = allocator.allocate(
+                    slug_base(note.title, max_length)
+                )
+                accepted.append(note)
+        return accepted, errors
+
+    def import_batch(self, batch):
+        started = time.perf_counter()
+        notes, errors = self.validate(batch)
+        explicit = [(note, note.slug) for _, note in notes]
+        for attempt in range(SLUG_ATTEMPTS):
+            accepted, slug_errors = self.assign_slugs(notes)
+            try:
+                with transaction.atomic():
+                    Note.objects.bulk_create(accepted)
+                break
+            except IntegrityError:
+                # Slug заняли параллельно: подбираем их заново.
+                for note, slug in explicit:
+                    note.slug = slug
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
+        # bulk_create не отправляет post_save, считаем пачку целиком.
+        NOTE_WRITES.inc(len(accepted), action='import')
+        result = ImportBatch(
+            number=len(self.batches) + 1,
+            created=len(accepted),
+            errors=errors + slug_errors,
+            elapsed=time.perf_counter() - started,
+        )
+        self.batches.append(result)
+        if self.on_batch is not None:
+            self.on_batch(result)
+        return result
@@ -0,0 +1,46 @@
+import sys
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.streaming import dump_queryset, open_stream
+
+DEFAULT_MODELS = ('notes.Note',)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает модели в JSON Lines в формате фикстур. '
+        'Файл с расширением .gz сжимается gzip.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', default=DEFAULT_MODELS)
+        parser.add_argument('-o', '--output')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        try:
+            models = [apps.get_model(label) for label in options['models']]
+        except (LookupError, ValueError) as error:
+            raise CommandError(error)
+        started = time.perf_counter()
+        total = 0
+        output = options['output']
+        stream = open_stream(output, 'wt') if output else sys.stdout
+        try:
+            for model in models:
+                queryset = model._default_manager.using(options['database'])
+                total += dump_queryset(
+                    queryset, stream, options['chunk_size']
+                )
+        finally:
+            if output:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f'Выгружено объектов: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} объектов/с)'
+        )
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+from notes.slugs import allocate_slugs
+from notes.streaming import BulkLoader, open_stream
+
+
+class NotesBulkLoader(BulkLoader):
+    """Загрузчик, который подбирает свободные slug пустым заметкам."""
+
+    def before_flush(self, model, objects):
+        if model is not Note:
+            return
+        without_slug = [note for note in objects if not note.slug]
+        if not without_slug:
+            return
+        slugs = allocate_slugs(
+            Note._default_manager.using(self.using),
+            [note.title for note in without_slug]
+        )
+        for note, slug in zip(without_slug, slugs):
+            note.slug = slug
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает данные из JSON Lines или JSON-массива '
+        'в формате фикстур, в том числе сжатых gzip (.gz).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        loader = NotesBulkLoader(
+            batch_size=options['batch_size'],
+            using=options['database'],
+            on_batch=self.report if options['verbosity'] > 1 else None,
+        )
+        for path in options['paths']:
+            with open_stream(path) as stream:
+                loader.load(stream)
+            self.report(loader.total, loader.elapsed)
+
+    def report(self, total, elapsed):
+        self.stdout.write(
+            f'Загружено объектов: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} объектов/с)'
+        )
@@ -0,0 +1,55 @@
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.importing import IMPORT_BATCH_SIZE, NoteImporter, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует заметки пользователя из zip-архива с .md файлами '
+        'или из JSON Lines пачками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        importer = NoteImporter(
+            user, options['batch_size'], on_batch=self.report
+        )
+        try:
+            with open(options['path'], 'rb') as file:
+                batches = importer.run(read_records(file, options['path']))
+        except ValidationError as error:
+            raise CommandError(' '.join(error.messages))
+        except zipfile.BadZipFile as error:
+            raise CommandError(f'Не удалось прочитать архив: {error}')
+        created = sum(batch.created for batch in batches)
+        elapsed = sum(batch.elapsed for batch in batches)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано заметок: {created} за {elapsed:.1f} с '
+            f'({created / max(elapsed, 1e-9):.0f} заметок/с)'
+        ))
+
+    def report(self, batch):
+        self.stdout.write(
+            f'Пачка {batch.number}: создано {batch.created}, '
+            f'ошибок {len(batch.errors)}, {batch.elapsed:.2f} с '
+            f'({batch.created / max(batch.elapsed, 1e-9):.0f} заметок/с)'
+        )
+        for source, message in batch.errors:
+            self.stderr.write(f'{source}: {message}')
@@ -1,7 +1,9 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
 
-from pytils.translit import slugify
+from .slugs import allocate_slug
+
+SLUG_ATTEMPTS = 5
 
 
 class Note(models.Model):
@@ -26,13 +28,37 @@ class Note(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
+    class Meta:
+        indexes = (
+            # Заметки автора по порядку; заменяет индекс по author.
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+    def save(self, *args, using=None, **kwargs):
+        """
+        Пустой slug подбираем из заголовка.
+
+        Если параллельный запрос занял тот же slug раньше нас,
+        подбираем следующий свободный и повторяем сохранение.
+        Свободный slug ищем в той базе, куда сохраняем заметку.
+        """
+        if self.slug:
+            return super().save(*args, using=using, **kwargs)
+        using = using or router.db_for_write(type(self), instance=self)
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocate_slug(
+                type(self)._default_manager.using(using), self.title, self.pk
+            )
+            try:
+                with transaction.atomic(using=using):
+                    return super().save(*args, using=using, **kwargs)
+            except IntegrityError:
+                self.slug = ''
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
@@ -0,0 +1,90 @@
+import base64
+import json
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+Page = namedtuple('Page', ('object_list', 'next_cursor'))
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по курсору вместо OFFSET.
+
+    Курсор хранит значения полей сортировки последнего объекта страницы,
+    поэтому следующая страница выбирается по индексу одинаково быстро
+    на любой глубине.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = ordering
+        self.per_page = per_page
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in ordering
+        ]
+
+    def encode_cursor(self, obj):
+        """Упаковываем значения полей сортировки объекта в строку."""
+        values = []
+        for field in self.fields:
+            value = field.value_from_object(obj)
+            values.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value
+            )
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Восстанавливаем значения полей из курсора."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise Http404('Некорректный курсор.')
+
+    def get_filter(self, values):
+        """
+        Условие «строго после курсора» в порядке сортировки.
+
+        Отдельное условие на первое поле задаёт диапазон,
+        по которому база начинает чтение индекса с нужного места.
+        """
+        conditions = []
+        for index, name in enumerate(self.ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition = {
+                self.fields[position].name: values[position]
+                for position in range(index)
+            }
+            condition[f'{self.fields[index].name}__{lookup}'] = values[index]
+            conditions.append(Q(**condition))
+        first_lookup = 'lte' if self.ordering[0].startswith('-') else 'gte'
+        return Q(**{
+            f'{self.fields[0].name}__{first_lookup}': values[0]
+        }) & reduce(or_, conditions)
+
+    def page(self, cursor=None):
+        """Возвращаем страницу после курсора и курсор следующей страницы."""
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(
+                self.get_filter(self.decode_cursor(cursor))
+            )
+        object_list = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[:self.per_page]
+            next_cursor = self.encode_cursor(object_list[-1])
+        return Page(object_list, next_cursor)
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from yanote.metrics import Counter
+
+from .models import Note
+
+NOTE_WRITES = Counter(
+    'note_writes_total', 'Записи заметок по действиям.', ('action',)
+)
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, **kwargs):
+    NOTE_WRITES.inc(action='create' if created else 'update')
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    NOTE_WRITES.inc(action='delete')
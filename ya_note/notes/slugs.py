@@ -0,0 +1,88 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+DEFAULT_SLUG = 'note'
+# Место под суффикс вида -1234567 у обрезанного slug.
+SUFFIX_RESERVE = 8
+# Символ сразу после цифр: все slug вида stem-N лежат левее stem + '-:'.
+RANGE_END = '-:'
+# Столько заголовков проверяем одним запросом: у каждого два условия
+# через OR и три параметра, а SQLite ограничивает глубину выражения
+# 1000 и (до версии 3.32) число параметров 999.
+QUERY_CHUNK_SIZE = 200
+
+
+def slug_base(title, max_length):
+    return slugify(title)[:max_length] or DEFAULT_SLUG
+
+
+class SlugAllocator:
+    """
+    Подбор свободных slug для одной или многих заметок.
+
+    Занятые slug с нужными началами выбираются одним запросом
+    по диапазонам уникального индекса, дальше суффиксы -N
+    подбираются в памяти, в том числе для повторов внутри пачки.
+    """
+
+    def __init__(self, queryset, bases, exclude_pk=None):
+        self.max_length = queryset.model._meta.get_field('slug').max_length
+        self.taken = set()
+        self.last_number = {}
+        bases = list(dict.fromkeys(bases))
+        for start in range(0, len(bases), QUERY_CHUNK_SIZE):
+            chunk = bases[start:start + QUERY_CHUNK_SIZE]
+            found = queryset.filter(reduce(or_, (
+                Q(slug=base) | Q(
+                    slug__gte=self.stem(base),
+                    slug__lt=self.stem(base) + RANGE_END
+                )
+                for base in chunk
+            )))
+            if exclude_pk is not None:
+                found = found.exclude(pk=exclude_pk)
+            self.taken.update(found.values_list('slug', flat=True))
+
+    def stem(self, base):
+        return base[:self.max_length - SUFFIX_RESERVE]
+
+    def allocate(self, base):
+        """Возвращаем base, если он свободен, иначе stem-N со следующим N."""
+        if base not in self.taken:
+            self.taken.add(base)
+            return base
+        stem = self.stem(base)
+        if stem not in self.last_number:
+            pattern = re.compile(re.escape(stem) + r'-(\d+)')
+            self.last_number[stem] = max(
+                (
+                    int(match.group(1)) for match in map(
+                        pattern.fullmatch, self.taken
+                    ) if match
+                ),
+                default=1
+            )
+        while True:
+            self.last_number[stem] += 1
+            slug = f'{stem}-{self.last_number[stem]}'
+            if slug not in self.taken:
+                self.taken.add(slug)
+                return slug
+
+
+def allocate_slugs(queryset, titles):
+    """Свободные slug для пачки заголовков одним запросом к базе."""
+    max_length = queryset.model._meta.get_field('slug').max_length
+    bases = [slug_base(title, max_length) for title in titles]
+    allocator = SlugAllocator(queryset, bases)
+    return [allocator.allocate(base) for base in bases]
+
+
+def allocate_slug(queryset, title, exclude_pk=None):
+    max_length = queryset.model._meta.get_field('slug').max_length
+    base = slug_base(title, max_length)
+    return SlugAllocator(queryset, [base], exclude_pk).allocate(base)
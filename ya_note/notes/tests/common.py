@@ -1,6 +1,6 @@
 from http import HTTPStatus
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
@@ -10,6 +10,7 @@ from .contstans import DETAIL_URl, LOGIN_URL
 User = get_user_model()
 
 
+@override_settings(QUERY_BUDGET_STRICT=True)
 class BaseTestClass(TestCase):
     NOTE_TEXT = 'Текст заметки'
     NOTE_TITLE = 'Заметка'
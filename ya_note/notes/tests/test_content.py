@@ -1,6 +1,18 @@
+import copy
+import importlib
+import sys
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
 from django.urls import reverse
 
+from notes.models import Note
 from .common import BaseTestClass
 
 
@@ -32,6 +44,43 @@ class TestListPage(BaseTestClass):
                 assert (self.note in objets_list) is note_in_list
 
 
+@override_settings(NOTES_COUNT_ON_PAGE=2)
+class TestListPagination(BaseTestClass):
+    """Класс проверяет постраничный вывод списка заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text=cls.NOTE_TEXT,
+                 slug=f'note-{index}', author=cls.author)
+            for index in range(4)
+        )
+
+    def test_pages_cover_all_notes(self):
+        # Проходим все страницы по курсору без пропусков и повторов.
+        url = reverse('notes:list')
+        response = self.client_auth.get(url)
+        shown = []
+        while True:
+            page = response.context['object_list']
+            self.assertLessEqual(len(page), 2)
+            shown += [note.pk for note in page]
+            next_cursor = response.context['next_cursor']
+            if next_cursor is None:
+                break
+            response = self.client_auth.get(url, {'cursor': next_cursor})
+        self.assertEqual(shown, list(Note.objects.filter(
+            author=self.author
+        ).order_by('id').values_list('pk', flat=True)))
+
+    def test_text_is_deferred(self):
+        # Текст заметки не загружается для списка.
+        response = self.client_auth.get(reverse('notes:list'))
+        for note in response.context['object_list']:
+            self.assertIn('text', note.get_deferred_fields())
+
+
 class TestContainForm(BaseTestClass):
     """
     Класс проверяет, что у авторизированного
@@ -54,3 +103,46 @@ class TestContainForm(BaseTestClass):
                 url = reverse(name, args=args)
                 response = self.client.get(url)
                 self.assertIn('form', response.context)
+
+
+class TestCompileTemplates(SimpleTestCase):
+
+    def test_compile_templates(self):
+        """Все шаблоны проекта разбираются без ошибок."""
+        stdout = StringIO()
+        call_command('compile_templates', stdout=stdout)
+        self.assertIn('Шаблонов разобрано: ', stdout.getvalue())
+
+    def test_compile_templates_errors(self):
+        """Команда находит синтаксические ошибки и несуществующие вставки."""
+        with TemporaryDirectory() as directory:
+            directory = Path(directory)
+            (directory / 'broken.html').write_text('{% if %}')
+            (directory / 'missing.html').write_text(
+                '{% include "nothing.html" %}'
+            )
+            templates = copy.deepcopy(settings.TEMPLATES)
+            templates[0]['DIRS'].append(directory)
+            stderr = StringIO()
+            with override_settings(TEMPLATES=templates):
+                with self.assertRaisesMessage(
+                    CommandError, 'Шаблонов с ошибками: 2'
+                ):
+                    call_command('compile_templates', stderr=stderr)
+        self.assertIn('broken.html', stderr.getvalue())
+        self.assertIn('nothing.html', stderr.getvalue())
+
+    def test_templates_warmed_up_on_start(self):
+        """WSGI и ASGI разбирают шаблоны при старте и пишут ошибки в лог."""
+        for module in ('yanote.wsgi', 'yanote.asgi'):
+            with self.subTest(module=module), mock.patch(
+                'yanote.template_cache.compile_templates',
+                return_value=(['notes/list.html'], {'broken.html': 'ошибка'})
+            ) as compile_templates:
+                with self.assertLogs('yanote.template_cache') as logs:
+                    sys.modules.pop(module, None)
+                    importlib.import_module(module)
+                compile_templates.assert_called_once_with()
+                self.assertIn(
+                    'Шаблон broken.html не разобран: ошибка', logs.output[0]
+                )
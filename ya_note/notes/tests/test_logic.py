@@ -1,11 +1,24 @@
+import csv
+import json
+import zipfile
 from http import HTTPStatus
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import SimpleTestCase
 from django.urls import reverse
 from pytils.translit import slugify
 
 from notes.models import Note
-from notes.forms import WARNING
+from notes.forms import ARCHIVE_WARNING, IMPORT_WARNING, WARNING
+from notes.slugs import allocate_slug, allocate_slugs
+from yanote.query_budget import query_budget
 from .contstans import (DELETE_URL,
                         EDIT_URL,
                         ADD_URL,
@@ -84,6 +97,66 @@ class TestSlugField(BaseTestClass):
         assert new_note.slug == expected_slug
 
 
+class TestSlugAllocation(BaseTestClass):
+
+    def test_similar_titles_get_suffix(self):
+        """Заметки с одинаковым заголовком получают суффиксы -2, -3."""
+        form_data = {'title': self.NOTE_TITLE, 'text': self.NOTE_TEXT}
+        for _ in range(3):
+            response = self.client_auth.post(reverse(ADD_URL), data=form_data)
+            self.assertRedirects(response, reverse(SUCCESS_URL))
+        base = slugify(self.NOTE_TITLE)
+        slugs = set(Note.objects.filter(
+            title=self.NOTE_TITLE
+        ).values_list('slug', flat=True))
+        self.assertEqual(
+            slugs, {self.NOTE_SLUG, base, f'{base}-2', f'{base}-3'}
+        )
+
+    def test_bulk_allocation_single_query(self):
+        """Slug для пачки заметок подбираются одним запросом."""
+        Note.objects.create(
+            title=self.NOTE_TITLE, text=self.NOTE_TEXT, author=self.author
+        )
+        titles = [self.NOTE_TITLE] * 3 + ['Другая']
+        with self.assertNumQueries(1):
+            slugs = allocate_slugs(Note.objects.all(), titles)
+        base = slugify(self.NOTE_TITLE)
+        self.assertEqual(
+            slugs,
+            [f'{base}-2', f'{base}-3', f'{base}-4', slugify('Другая')]
+        )
+
+    def test_allocate_slugs_large_batch(self):
+        """Большая пачка разных заголовков проверяется частями."""
+        titles = [f'Заметка {index}' for index in range(1000)]
+        with self.assertNumQueries(5):
+            slugs = allocate_slugs(Note.objects.all(), titles)
+        self.assertEqual(slugs, [slugify(title) for title in titles])
+
+    def test_retry_on_integrity_error(self):
+        """Если slug заняли параллельно, сохранение повторяется."""
+        taken = self.note.slug
+        with mock.patch(
+            'notes.models.allocate_slug',
+            side_effect=[taken, 'free-slug']
+        ):
+            note = Note.objects.create(
+                title=self.NOTE_TITLE, text=self.NOTE_TEXT, author=self.author
+            )
+        self.assertEqual(note.slug, 'free-slug')
+
+    def test_own_slug_is_kept(self):
+        """При пересохранении заметка не конфликтует сама с собой."""
+        base = slugify(self.NOTE_TITLE)
+        note = Note.objects.create(
+            title=self.NOTE_TITLE, text=self.NOTE_TEXT, author=self.author
+        )
+        self.assertEqual(
+            allocate_slug(Note.objects.all(), self.NOTE_TITLE, note.pk), base
+        )
+
+
 class TestNoteEditDelete(BaseTestClass):
     NEW_NOTE_TITLE = 'New title'
     NEW_NOTE_TEXT = 'New Text'
@@ -143,3 +216,214 @@ class TestNoteEditDelete(BaseTestClass):
                     args=(self.note.slug,)))
         self.assertEqual(response.status_code, self.NOT_FOUND)
         self.assertEqual(Note.objects.count(), note_count)
+
+
+class TestBulkLoad(BaseTestClass):
+
+    def test_bulk_dump_and_load(self):
+        """Выгрузка и потоковая загрузка сохраняют заметки."""
+        with TemporaryDirectory() as directory:
+            for file_name in ('notes.jsonl', 'notes.jsonl.gz'):
+                with self.subTest(file_name=file_name):
+                    path = str(Path(directory) / file_name)
+                    call_command('bulkdump', '-o', path, stderr=StringIO())
+                    Note.objects.all().delete()
+                    call_command('bulkload', path, stdout=StringIO())
+                    note = Note.objects.get()
+                    self.assertEqual(note.slug, self.NOTE_SLUG)
+                    self.assertEqual(note.author, self.author)
+
+    def test_bulk_load_fills_slug(self):
+        """Пустой slug заполняется из заголовка, как при сохранении."""
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.jsonl'
+            path.write_text(
+                '{"model": "notes.note", "fields": {"title": "Новая", '
+                f'"text": "Текст", "author": {self.author.pk}}}}}\n',
+                encoding='utf-8'
+            )
+            call_command('bulkload', str(path), stdout=StringIO())
+        self.assertTrue(Note.objects.filter(slug=slugify('Новая')).exists())
+
+
+class TestExport(BaseTestClass):
+
+    def read_archive(self, data, name):
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            self.assertEqual(archive.namelist(), [name])
+            return archive.read(name).decode()
+
+    def test_export_json(self):
+        """Выгрузка в JSON содержит только заметки пользователя."""
+        response = self.client_auth.get(reverse('notes:export'))
+        self.assertTrue(response.streaming)
+        notes = json.loads(self.read_archive(
+            b''.join(response.streaming_content), 'notes.json'
+        ))
+        self.assertEqual(notes, [{
+            'id': self.note.pk, 'title': self.NOTE_TITLE,
+            'slug': self.NOTE_SLUG, 'text': self.NOTE_TEXT,
+        }])
+        response = self.not_author_client.get(reverse('notes:export'))
+        self.assertEqual(json.loads(self.read_archive(
+            b''.join(response.streaming_content), 'notes.json'
+        )), [])
+
+    def test_export_csv_command(self):
+        """Команда выгрузки пишет CSV по частям в zip-архив."""
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text=self.NOTE_TEXT,
+                 slug=f'note-{index}', author=self.author)
+            for index in range(5)
+        )
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.zip'
+            call_command(
+                'export_notes', self.author.username, '-o', str(path),
+                '--format', 'csv', '--chunk-size', '2', stdout=StringIO()
+            )
+            rows = list(csv.DictReader(StringIO(
+                self.read_archive(path.read_bytes(), 'notes.csv')
+            )))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['slug'], self.NOTE_SLUG)
+
+
+class TestImport(BaseTestClass):
+
+    @staticmethod
+    def markdown_archive(files):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+        return buffer.getvalue()
+
+    def test_import_markdown_archive(self):
+        """Заметки из архива создаются пачками со сгенерированными slug."""
+        data = self.markdown_archive({
+            'first.md': '# Первая\nТекст первой',
+            'notes/second.md': 'Текст второй',
+            'third.md': '# Первая\nЕщё текст',
+            'readme.txt': 'не заметка',
+        })
+        with query_budget('notes:import'):
+            response = self.client_auth.post(reverse('notes:import'), {
+                'file': SimpleUploadedFile('notes.zip', data)
+            })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['created'], 3)
+        notes = Note.objects.filter(author=self.author).exclude(
+            pk=self.note.pk
+        ).order_by('id')
+        self.assertEqual(
+            [(note.title, note.text, note.slug) for note in notes],
+            [('Первая', 'Текст первой', slugify('Первая')),
+             ('second', 'Текст второй', 'second'),
+             ('Первая', 'Ещё текст', f'{slugify("Первая")}-2')]
+        )
+
+    def test_import_json_lines_errors(self):
+        """Ошибочные строки и занятые slug попадают в отчёт пачки."""
+        lines = '\n'.join((
+            json.dumps({'title': 'Новая', 'text': 'Текст', 'slug': 'new'}),
+            json.dumps({'title': 'Чужая', 'text': 'Текст',
+                        'slug': self.NOTE_SLUG}),
+            'не json',
+            json.dumps({'title': 'Без текста'}),
+        ))
+        response = self.client_auth.post(reverse('notes:import'), {
+            'file': SimpleUploadedFile('notes.jsonl', lines.encode())
+        })
+        batch, = response.context['batches']
+        self.assertEqual(batch.created, 1)
+        self.assertEqual(
+            sorted(source for source, message in batch.errors),
+            ['строка 2', 'строка 3', 'строка 4']
+        )
+        self.assertTrue(Note.objects.filter(
+            slug='new', author=self.author
+        ).exists())
+
+    def test_import_wrong_extension(self):
+        """Файлы других форматов форма не принимает."""
+        response = self.client_auth.post(reverse('notes:import'), {
+            'file': SimpleUploadedFile('notes.txt', b'text')
+        })
+        self.assertFormError(response, 'form', 'file', IMPORT_WARNING)
+
+    def test_import_archive_limits(self):
+        """Слишком большие архивы отклоняются до распаковки."""
+        notes = Note.objects.count()
+        half = 'я' * (1 << 18)
+        cases = (
+            ({'IMPORT_MAX_FILE_SIZE': 1 << 20}, {'big.md': half * 2 + 'я'},
+             'Файл big.md больше 1024 КБ.'),
+            ({'IMPORT_MAX_TOTAL_SIZE': 1 << 20},
+             {'1.md': half, '2.md': half, '3.md': half},
+             'Распакованный архив больше 1 МБ.'),
+            ({'IMPORT_MAX_FILES': 2}, {'1.md': '', '2.md': '', '3.md': ''},
+             'В архиве больше 2 файлов.'),
+        )
+        for limits, files, message in cases:
+            with self.subTest(message=message), \
+                    mock.patch.multiple('notes.importing', **limits):
+                response = self.client_auth.post(reverse('notes:import'), {
+                    'file': SimpleUploadedFile(
+                        'notes.zip', self.markdown_archive(files)
+                    )
+                })
+                self.assertFormError(response, 'form', 'file', message)
+        response = self.client_auth.post(reverse('notes:import'), {
+            'file': SimpleUploadedFile('notes.zip', b'not a zip')
+        })
+        self.assertFormError(response, 'form', 'file', ARCHIVE_WARNING)
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.zip'
+            path.write_bytes(self.markdown_archive(cases[0][1]))
+            with self.assertRaisesMessage(CommandError, cases[0][2]):
+                call_command('import_notes', self.reader.username, str(path))
+        self.assertEqual(Note.objects.count(), notes)
+
+    def test_import_command_batches(self):
+        """Команда импорта сообщает о каждой пачке."""
+        lines = '\n'.join(
+            json.dumps({'title': f'Заметка {index}', 'text': 'Текст'})
+            for index in range(5)
+        )
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.jsonl'
+            path.write_text(lines, encoding='utf-8')
+            stdout = StringIO()
+            call_command(
+                'import_notes', self.reader.username, str(path),
+                '--batch-size', '2', stdout=stdout
+            )
+        self.assertEqual(stdout.getvalue().count('Пачка'), 3)
+        self.assertEqual(Note.objects.filter(author=self.reader).count(), 5)
+
+
+class TestSqlitePragmas(SimpleTestCase):
+    databases = {'default'}
+
+    def test_new_connection_pragmas(self):
+        """Новое соединение с файлом базы включает WAL и busy_timeout."""
+        with TemporaryDirectory() as directory:
+            default = connections['default']
+            wrapper = type(default)({
+                **default.settings_dict,
+                'NAME': str(Path(directory) / 'db.sqlite3'),
+            })
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {
+                        name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                        for name in (
+                            'journal_mode', 'synchronous', 'busy_timeout'
+                        )
+                    }
+            finally:
+                wrapper.close()
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000
+        })
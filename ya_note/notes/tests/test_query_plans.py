@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+from yanote.query_plans import captured_plan_problems, plan_problems
+from .common import BaseTestClass
+
+
+class TestQueryPlans(BaseTestClass):
+    """
+    Класс проверяет планы запросов всех представлений заметок:
+    без полных проходов по таблицам и сортировок во временном B-дереве.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text=cls.NOTE_TEXT,
+                 slug=f'note-{index}', author=author)
+            for index in range(20)
+            for author in [(cls.author, cls.reader)[index % 2]]
+        )
+
+    def assert_good_plans(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            getattr(self.client_auth, method)(url, data)
+        self.assertEqual(captured_plan_problems(queries.captured_queries), {})
+
+    def test_detects_problems(self):
+        # Проверка сама находит полный проход и сортировку.
+        problems = plan_problems(
+            "SELECT * FROM notes_note WHERE text = 'x' ORDER BY title"
+        )
+        self.assertEqual(len(problems), 2)
+
+    @override_settings(NOTES_COUNT_ON_PAGE=2)
+    def test_read_views(self):
+        cursor = self.client_auth.get(
+            reverse('notes:list')
+        ).context['next_cursor']
+        urls = (
+            reverse('notes:list'),
+            f"{reverse('notes:list')}?cursor={cursor}",
+            reverse('notes:detail', args=self.slug),
+            reverse('notes:edit', args=self.slug),
+            reverse('notes:delete', args=self.slug),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_good_plans('get', url)
+
+    def test_write_views(self):
+        form_data = {'title': self.NOTE_TITLE, 'text': self.NOTE_TEXT}
+        requests = (
+            ('post', reverse('notes:add'), form_data),
+            ('post', reverse('notes:edit', args=self.slug), form_data),
+            ('post', reverse('notes:delete', args=('note-0',)), None),
+        )
+        for method, url, data in requests:
+            with self.subTest(url=url):
+                self.assert_good_plans(method, url, data)
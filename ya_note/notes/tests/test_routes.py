@@ -1,11 +1,46 @@
+import multiprocessing
+import pstats
+import re
+import runpy
+import sys
+from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from notes.signals import NOTE_WRITES
+from yanote.metrics import render
+from yanote.profiling import collect_profiles, profile_path, profile_token
+from yanote.query_budget import QueryBudgetExceeded, query_budget
 from .common import BaseTestClass
 
 User = get_user_model()
 
 
+def session_cached(cache_key, flushed):
+    """
+    Воркер, который уже обслуживал пользователя: после его выхода
+    в другом воркере сессии не должно быть и в этом кэше.
+    """
+    flushed.wait()
+    sys.exit(caches['sessions'].get(cache_key) is not None)
+
+
+async def asgi_get(url):
+    return await AsyncClient().get(url)
+
+
 class TestRoutes(BaseTestClass):
     """
     Класс отвечает за тестирование маршрутов, а именно:
@@ -56,7 +91,9 @@ class TestRoutes(BaseTestClass):
             ('notes:delete', (self.note.slug,)),
             ('notes:add', None),
             ('notes:success', None),
-            ('notes:list', None)
+            ('notes:list', None),
+            ('notes:import', None),
+            ('notes:export', None)
         )
 
         login_url = reverse('users:login')
@@ -66,3 +103,208 @@ class TestRoutes(BaseTestClass):
                 redirect_url = f'{login_url}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+    def test_pages_fit_query_budget(self):
+        """Страницы укладываются в бюджет SQL-запросов из настроек."""
+        urls = (
+            ('notes:list', None),
+            ('notes:detail', self.slug),
+            ('notes:edit', self.slug),
+            ('notes:delete', self.slug),
+            ('notes:add', None),
+        )
+        for name, args in urls:
+            with self.subTest(name=name):
+                with query_budget(name):
+                    self.client_auth.get(reverse(name, args=args))
+
+    def test_query_budget_exceeded(self):
+        """Превышение бюджета в строгом режиме приводит к ошибке."""
+        with self.settings(QUERY_BUDGETS={'notes:list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client_auth.get(reverse('notes:list'))
+
+    def test_streaming_queries_counted(self):
+        """Запросы при выдаче потокового ответа входят в бюджет маршрута."""
+        with self.settings(QUERY_BUDGETS={'notes:export': 1}):
+            response = self.client_auth.get(reverse('notes:export'))
+            with self.assertRaises(QueryBudgetExceeded):
+                b''.join(response.streaming_content)
+
+    def test_query_wrappers_not_leaked(self):
+        """Счётчик и таймер запросов не копятся в обёртках соединений."""
+        self.client_auth.get(self.detail_url)
+        wrappers = [list(db.execute_wrappers) for db in connections.all()]
+        for url in (self.detail_url, reverse('notes:list')) * 2:
+            self.client_auth.get(url)
+        self.assertEqual(
+            [list(db.execute_wrappers) for db in connections.all()], wrappers
+        )
+
+    def test_session_read_from_cache(self):
+        """Сессия авторизованного пользователя читается из кэша."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_auth.get(reverse('notes:list'))
+        self.assertEqual(response.status_code, self.OK)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'django_session' in query['sql']
+        ])
+
+    def test_flushed_session_rejected(self):
+        """После выхода старый ключ сессии не действует ни в одном воркере."""
+        client = Client()
+        client.force_login(self.author)
+        key = client.cookies[settings.SESSION_COOKIE_NAME].value
+        context = multiprocessing.get_context('fork')
+        flushed = context.Event()
+        worker = context.Process(
+            target=session_cached,
+            args=(SessionStore(key).cache_key, flushed)
+        )
+        worker.start()
+        client.get(reverse('users:logout'))
+        flushed.set()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = key
+        response = client.get(reverse('notes:list'))
+        self.assertRedirects(
+            response, f'{self.login_url}?next={reverse("notes:list")}'
+        )
+
+    def test_profiling_signed_header(self):
+        """Профилируется только запрос с верно подписанным заголовком."""
+        with TemporaryDirectory() as directory:
+            with self.settings(PROFILING_DIR=directory,
+                               PROFILING_SAMPLE_RATE=0):
+                self.client_auth.get(
+                    self.detail_url, HTTP_X_PROFILE='profile:подделка'
+                )
+                self.client_auth.get(self.detail_url)
+                self.assertFalse(list(Path(directory).iterdir()))
+                self.client_auth.get(
+                    self.detail_url, HTTP_X_PROFILE=profile_token()
+                )
+            (path,) = Path(directory).glob('notes.detail.*.prof')
+            self.assertGreater(pstats.Stats(str(path)).total_calls, 0)
+
+    def test_profiling_rotation_and_report(self):
+        """Хранятся последние профили, отчёт сводит их по маршрутам."""
+        with TemporaryDirectory() as directory:
+            with self.settings(PROFILING_DIR=directory,
+                               PROFILING_SAMPLE_RATE=1,
+                               PROFILING_MAX_FILES=3):
+                for url in (reverse('notes:list'), self.detail_url,
+                            self.detail_url, self.detail_url):
+                    self.client_auth.get(url)
+            profiles = Path(directory)
+            self.assertEqual(len(list(profiles.glob('notes.detail.*'))), 3)
+            self.assertFalse(list(profiles.glob('notes.list.*')))
+            stdout = StringIO()
+            call_command('profile_report', dir=directory, top=5,
+                         stdout=stdout)
+        self.assertIn('notes:detail: профилей 3', stdout.getvalue())
+        self.assertIn('function calls', stdout.getvalue())
+
+    def test_profiling_off_under_asgi(self):
+        """Под ASGI запрос из выборки не профилируется, а отмечается в логе."""
+        with TemporaryDirectory() as directory, \
+                self.settings(PROFILING_DIR=directory,
+                              PROFILING_SAMPLE_RATE=1):
+            with self.assertLogs('yanote.profiling', 'WARNING') as logs:
+                async_to_sync(asgi_get)(self.detail_url)
+            self.assertFalse(list(Path(directory).iterdir()))
+        self.assertIn(f'Запрос {self.detail_url} не профилируется',
+                      logs.output[0])
+
+    def test_profile_nested_namespace(self):
+        """Имя маршрута из вложенных пространств имён читается из файла."""
+        with TemporaryDirectory() as directory:
+            path = profile_path(directory, 'a:b:view')
+            path.touch()
+            self.assertEqual(
+                collect_profiles(directory), {'a:b:view': [path]}
+            )
+
+    def test_server_timing(self):
+        """Заголовок и строка лога разбивают время на SQL, шаблоны и view."""
+        with self.assertLogs('yanote.server_timing', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client_auth.get(self.detail_url)
+        timing = {
+            name: float(duration) for name, duration in re.findall(
+                r'(\w+);dur=([\d.]+)', response['Server-Timing']
+            )
+        }
+        self.assertIn(f'SQL, {len(queries)} q', response['Server-Timing'])
+        self.assertGreater(timing['db'], 0)
+        self.assertGreater(timing['tpl'], 0)
+        self.assertGreaterEqual(timing['view'], timing['db'] + timing['tpl'])
+        (record,) = logs.records
+        self.assertEqual(record.server_timing['view'], 'notes:detail')
+        self.assertEqual(record.server_timing['queries'], len(queries))
+
+    def test_metrics_allowed_networks(self):
+        """/metrics отдаётся только клиентам из METRICS_ALLOWED_NETWORKS."""
+        for address, status in (
+            ('127.0.0.1', self.OK), ('::1', self.OK),
+            ('203.0.113.5', HTTPStatus.FORBIDDEN),
+        ):
+            with self.subTest(address=address):
+                response = self.client.get('/metrics', REMOTE_ADDR=address)
+                self.assertEqual(response.status_code, status)
+
+    def test_metrics_cleared_on_start(self):
+        """Мастер gunicorn при старте удаляет метрики прошлого запуска."""
+        with TemporaryDirectory() as directory, \
+                self.settings(METRICS_DIR=Path(directory)):
+            NOTE_WRITES.inc(action='create')
+            hooks = runpy.run_path(
+                str(settings.BASE_DIR / 'gunicorn.conf.py')
+            )
+            hooks['on_starting'](None)
+            self.assertEqual(list(Path(directory).glob('*.db')), [])
+            NOTE_WRITES.inc(action='create')
+            self.assertIn(
+                'note_writes_total{action="create"} 1.0',
+                render(directory).splitlines()
+            )
+
+    def test_metrics(self):
+        """/metrics сводит метрики всех процессов хоста."""
+        with TemporaryDirectory() as directory, \
+                self.settings(METRICS_DIR=Path(directory)):
+            self.client_auth.get(self.detail_url)
+            self.client_auth.post(reverse('notes:add'), data={
+                'title': 'Новая заметка', 'text': 'Текст', 'slug': 'new'
+            })
+            # Другой воркер того же хоста пишет в свой файл.
+            worker = multiprocessing.get_context('fork').Process(
+                target=NOTE_WRITES.inc, args=(2,),
+                kwargs={'action': 'create'}
+            )
+            worker.start()
+            worker.join()
+            self.assertEqual(len(list(Path(directory).glob('*.db'))), 2)
+            response = self.client.get('/metrics')
+        self.assertTrue(
+            response['Content-Type'].startswith('text/plain; version=0.0.4')
+        )
+        lines = response.content.decode().splitlines()
+        for line in (
+            'note_writes_total{action="create"} 3.0',
+            'http_requests_total{view="notes:detail",method="GET",'
+            'status="200"} 1.0',
+            'http_requests_total{view="notes:add",method="POST",'
+            'status="302"} 1.0',
+            'http_request_duration_seconds_count{view="notes:detail"} 1.0',
+            'cache_requests_total{cache="sessions",result="hit"} 2.0',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, lines)
+        self.assertTrue([
+            line for line in lines
+            if line.startswith('db_queries_total{view="notes:detail"}')
+        ])
@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .export import EXPORT_FORMATS, export_notes
+from .forms import NoteForm, NoteImportForm
+from .importing import NoteImporter, read_records
 from .models import Note
+from .pagination import KeysetPaginator
 
 
 class Home(generic.TemplateView):
@@ -32,9 +37,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -50,10 +53,66 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """Список заметок пользователя по страницам."""
     template_name = 'notes/list.html'
+    ordering = ('id',)
+    cursor_param = 'cursor'
+
+    def get_queryset(self):
+        """
+        Выводим страницу после курсора из запроса.
+
+        Загружаем только поля, которые нужны шаблону списка.
+        """
+        paginator = KeysetPaginator(
+            super().get_queryset().only('id', 'slug', 'title'),
+            self.ordering,
+            settings.NOTES_COUNT_ON_PAGE
+        )
+        self.page = paginator.page(self.request.GET.get(self.cursor_param))
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
+        return context
 
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NotesImport(LoginRequiredMixin, generic.FormView):
+    """Массовый импорт заметок из загруженного файла."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+
+    def form_valid(self, form):
+        file = form.cleaned_data['file']
+        batches = NoteImporter(self.request.user).run(
+            read_records(file, file.name)
+        )
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            batches=batches,
+            created=sum(batch.created for batch in batches),
+            elapsed=sum(batch.elapsed for batch in batches),
+        ))
+
+
+class NotesExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя zip-архивом в JSON или CSV."""
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'json')
+        if export_format not in EXPORT_FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        response = StreamingHttpResponse(
+            export_notes(request.user, export_format),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes-{export_format}.zip"'
+        )
+        return response
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite с настройками для конкурентной нагрузки.
+
+    Каждое новое соединение выполняет PRAGMA из settings.SQLITE_PRAGMAS:
+    WAL не блокирует чтение во время записи, а busy_timeout заставляет
+    писателя подождать освобождения базы вместо ошибки
+    «database is locked».
+    """
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
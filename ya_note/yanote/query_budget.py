@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_wrappers = ContextVar('query_wrappers', default=())
+_END = object()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Представление выполнило больше SQL-запросов, чем разрешено."""
+
+
+def run_wrappers(execute, sql, params, many, context):
+    """Выполняем запрос через обёртки текущего контекста."""
+    for wrapper in reversed(_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install_wrappers(connection, **kwargs):
+    """
+    Подключаем run_wrappers к соединению один раз и первой обёрткой.
+
+    Обёртки запроса хранятся в контексте, а не в списке соединения:
+    под ASGI запросы одного HTTP-запроса выполняются в разных потоках
+    с разными соединениями, а asgiref переносит контекст в каждый из
+    них. Список соединения не меняется от запроса к запросу, а блоки
+    connection.execute_wrapper, которые снимают последнюю обёртку,
+    не задевают run_wrappers в его начале.
+    """
+    if run_wrappers not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, run_wrappers)
+
+
+connection_created.connect(install_wrappers)
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """Оборачиваем запросы ко всем базам внутри блока."""
+    # Соединения, открытые до импорта модуля, сигнал не застал.
+    for connection in connections.all():
+        install_wrappers(connection)
+    token = _wrappers.set(_wrappers.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        _wrappers.reset(token)
+
+
+class QueryCounter:
+    """Обёртка выполнения запросов, которая их считает."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Считаем запросы ко всем базам внутри блока."""
+    counter = QueryCounter()
+    with wrap_queries(counter):
+        yield counter
+
+
+def check_budget(view_name, count, strict=None):
+    """
+    Сравниваем число запросов с бюджетом из settings.QUERY_BUDGETS.
+
+    В строгом режиме превышение бюджета — ошибка, иначе — запись в лог.
+    """
+    budget = settings.QUERY_BUDGETS.get(view_name)
+    if budget is None or count <= budget:
+        return
+    message = (
+        f'Превышен бюджет SQL-запросов для {view_name}: '
+        f'{count} при бюджете {budget}'
+    )
+    if strict is None:
+        strict = settings.QUERY_BUDGET_STRICT
+    if strict:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+@contextmanager
+def query_budget(view_name):
+    """Тестовый помощник: блок должен уложиться в бюджет представления."""
+    with count_queries() as counter:
+        yield counter
+    check_budget(view_name, counter.count, strict=True)
+
+
+class QueryBudgetMiddleware:
+    """Проверяем число запросов каждого представления по имени маршрута."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with count_queries() as counter:
+            response = self.get_response(request)
+        return self.finish(request, response, counter)
+
+    async def __acall__(self, request):
+        with count_queries() as counter:
+            response = await self.get_response(request)
+        return self.finish(request, response, counter)
+
+    def finish(self, request, response, counter):
+        """
+        Проверяем бюджет, когда запросы представления закончились.
+
+        Тело потокового ответа читает базу уже после выхода из
+        middleware, поэтому его запросы считаем при выдаче частей
+        и проверяем бюджет после последней из них.
+        """
+        if response.streaming:
+            response.streaming_content = self.counted(
+                request, response.streaming_content, counter
+            )
+        else:
+            self.check(request, counter)
+        return response
+
+    def counted(self, request, content, counter):
+        content = iter(content)
+        while True:
+            with wrap_queries(counter):
+                chunk = next(content, _END)
+            if chunk is _END:
+                break
+            yield chunk
+        self.check(request, counter)
+
+    def check(self, request, counter):
+        if request.resolver_match is not None:
+            check_budget(request.resolver_match.view_name, counter.count)
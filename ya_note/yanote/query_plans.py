@@ -0,0 +1,37 @@
+from django.db import connections
+
+# Запросы, план которых имеет смысл проверять.
+EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def query_plan(sql, using='default'):
+    """Строки EXPLAIN QUERY PLAN для запроса SQLite."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(sql, using='default'):
+    """
+    Полные проходы по таблицам и сортировки во временном B-дереве.
+
+    Проход по индексу или по виртуальной таблице FTS проблемой не считаем.
+    """
+    if not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+        return []
+    problems = []
+    for detail in query_plan(sql, using):
+        full_scan = detail.startswith('SCAN') and 'INDEX' not in detail
+        if full_scan or 'TEMP B-TREE' in detail:
+            problems.append(detail)
+    return problems
+
+
+def captured_plan_problems(captured_queries, using='default'):
+    """Проблемы планов для запросов из CaptureQueriesContext."""
+    return {
+        query['sql']: problems
+        for query in captured_queries
+        for problems in [plan_problems(query['sql'], using)]
+        if problems
+    }
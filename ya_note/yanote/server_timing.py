@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from yanote.query_budget import wrap_queries
+
+logger = logging.getLogger(__name__)
+
+_timing = ContextVar('server_timing', default=None)
+
+
+class RequestTiming:
+    """Время SQL-запросов, рендеринга шаблонов и представления, в секундах."""
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+        self.view = 0.0
+
+    def header(self):
+        """Значение заголовка Server-Timing, длительности в миллисекундах."""
+        return ', '.join((
+            f'db;dur={self.db * 1000:.3f};desc="SQL, {self.queries} q"',
+            f'tpl;dur={self.template * 1000:.3f};desc="Templates"',
+            f'view;dur={self.view * 1000:.3f};desc="View"',
+        ))
+
+    def fields(self):
+        return {
+            'db_ms': round(self.db * 1000, 3),
+            'queries': self.queries,
+            'tpl_ms': round(self.template * 1000, 3),
+            'view_ms': round(self.view * 1000, 3),
+        }
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка выполнения запросов, которая копит их время."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+@contextmanager
+def timing():
+    """Замеряем время представления и всего, что оно вызывает, в блоке."""
+    request_timing = RequestTiming()
+    token = _timing.set(request_timing)
+    started = time.perf_counter()
+    try:
+        with wrap_queries(request_timing):
+            yield request_timing
+    finally:
+        request_timing.view += time.perf_counter() - started
+        _timing.reset(token)
+
+
+@contextmanager
+def template_timer():
+    """Учитываем блок как рендеринг шаблонов текущего запроса."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        request_timing = _timing.get()
+        if request_timing is not None:
+            request_timing.template += time.perf_counter() - started
+
+
+class ServerTimingMiddleware:
+    """
+    Заголовок Server-Timing и строка лога с разбивкой времени запроса.
+
+    Стоит последним в MIDDLEWARE, поэтому view — это время самого
+    представления вместе с его SQL-запросами (db) и рендерингом
+    TemplateResponse (tpl). Замеры остаются в request.server_timing.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with timing() as request_timing:
+            response = self.get_response(request)
+        return self.finish(request, response, request_timing)
+
+    async def __acall__(self, request):
+        with timing() as request_timing:
+            response = await self.get_response(request)
+        return self.finish(request, response, request_timing)
+
+    def process_template_response(self, request, response):
+        request_timing = _timing.get()
+        if request_timing is None or response.is_rendered:
+            return response
+        started = time.perf_counter()
+
+        def rendered(response):
+            request_timing.template += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, request_timing):
+        request.server_timing = request_timing
+        header = request_timing.header()
+        if response.has_header('Server-Timing'):
+            header = f'{response["Server-Timing"]}, {header}'
+        response['Server-Timing'] = header
+        match = request.resolver_match
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match is not None else None,
+            'status': response.status_code,
+            **request_timing.fields(),
+        }
+        logger.info(
+            ' '.join(f'{name}={value}' for name, value in fields.items()),
+            extra={'server_timing': fields}
+        )
+        return response
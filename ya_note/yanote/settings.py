@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.profiling.ProfilingMiddleware',
+    'yanote.metrics.MetricsMiddleware',
+    'yanote.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -29,16 +33,30 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanote.server_timing.ServerTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
 
+# Профиль шаблонов: в 'production' разобранные шаблоны кэшируются
+# в памяти процесса независимо от DEBUG (runserver всё равно сбрасывает
+# кэш при изменении файлов), в 'development' читаются при каждом рендеринге.
+TEMPLATE_PROFILE = os.environ.get('TEMPLATE_PROFILE', 'production')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -54,11 +72,55 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yanote.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение переживает запрос, а не открывается заново каждый раз.
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            # Размер кэша подготовленных выражений модуля sqlite3.
+            'cached_statements': 256,
+        },
     }
 }
 
+# PRAGMA, которые выполняются при открытии каждого соединения.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    # Отрицательное значение — размер кэша страниц в КиБ.
+    'cache_size': -16000,
+    'mmap_size': 128 * 2 ** 20,
+    'temp_store': 'MEMORY',
+}
+
+
+# Кэши в памяти процесса, которые считают попадания и промахи для /metrics.
+CACHES = {
+    'default': {
+        'BACKEND': 'yanote.backends.cache.LocMemCache',
+    },
+    # Отдельный кэш сессий, чтобы их не вытесняли другие записи,
+    # общий для всех воркеров хоста: выход пользователя в одном воркере
+    # сразу закрывает сессию и в остальных. При нескольких хостах
+    # сюда нужен memcached или Redis. Записи кэша — pickle, поэтому
+    # каталог лежит в проекте, а не в общем для всех пользователей /tmp.
+    'sessions': {
+        'BACKEND': 'yanote.backends.cache.FileBasedCache',
+        'LOCATION': Path(
+            os.environ.get('SESSION_CACHE_DIR')
+            or BASE_DIR / 'cache' / 'sessions'
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
+}
+
+# Сессии читаются из кэша и пишутся ещё и в базу: при промахе кэша
+# или перезапуске процесса пользователь не разлогинивается.
+# Вариант без базы — 'django.contrib.sessions.backends.signed_cookies'.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +149,55 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 100
+
+# Сколько SQL-запросов может выполнить представление за один запрос,
+# включая чтение сессии и пользователя.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:detail': 3,
+    'notes:add': 6,
+    'notes:edit': 7,
+    'notes:delete': 4,
+    'notes:success': 2,
+    'notes:export': 2,
+    # Одна пачка IMPORT_BATCH_SIZE заметок; каждая следующая добавляет
+    # столько же запросов, и такой импорт попадёт в лог.
+    'notes:import': 12,
+}
+QUERY_BUDGET_STRICT = False
+
+# Строка лога с разбивкой времени каждого запроса (см. Server-Timing).
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yanote.server_timing': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Каталог, где каждый процесс хранит свои метрики; общий для всех
+# воркеров хоста. Мастер gunicorn очищает его при старте (см.
+# gunicorn.conf.py). Каталог лежит в проекте: в общий /tmp другие
+# пользователи хоста могли бы подложить свои файлы метрик.
+METRICS_DIR = Path(os.environ.get('METRICS_DIR') or BASE_DIR / 'metrics')
+# Сети, из которых можно читать /metrics; по умолчанию только с хоста.
+# За обратным прокси адрес клиента — адрес прокси, поэтому прокси
+# не должен пропускать /metrics снаружи.
+METRICS_ALLOWED_NETWORKS = os.environ.get(
+    'METRICS_ALLOWED_NETWORKS', '127.0.0.0/8,::1/128'
+).split(',')
+
+# Профилирование cProfile: доля случайных запросов и запросы с подписанным
+# заголовком (значение выдаёт manage.py profile_report --token). Хранится
+# не больше PROFILING_MAX_FILES последних профилей.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_HEADER = 'X-Profile'
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_FILES = 500
@@ -0,0 +1,77 @@
+import logging
+from pathlib import Path
+
+from django.template import (
+    TemplateDoesNotExist, TemplateSyntaxError, engines
+)
+from django.template.backends.django import DjangoTemplates
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.utils.autoreload import is_django_path
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Имена шаблонов проекта и приложений, без шаблонов самого Django."""
+    names = set()
+    for loader in engine.template_loaders:
+        for sub_loader in getattr(loader, 'loaders', [loader]):
+            for directory in sub_loader.get_dirs():
+                directory = Path(directory)
+                if is_django_path(directory) or not directory.is_dir():
+                    continue
+                names.update(
+                    path.relative_to(directory).as_posix()
+                    for path in directory.rglob('*')
+                    if path.suffix in TEMPLATE_SUFFIXES
+                )
+    return sorted(names)
+
+
+def referenced_names(template):
+    """Постоянные имена шаблонов из {% extends %} и {% include %}."""
+    nodes = template.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode))
+    for node in nodes:
+        if isinstance(node, ExtendsNode):
+            expression = node.parent_name
+        else:
+            expression = node.template
+        if isinstance(expression.var, str) and not expression.filters:
+            yield expression.var
+
+
+def compile_templates():
+    """
+    Разбираем все шаблоны и проверяем, что их родители и вставки существуют.
+
+    С кэширующим загрузчиком разобранные шаблоны остаются в памяти
+    процесса, и первый запрос не тратит время на разбор.
+    Возвращаем имена разобранных шаблонов и словарь ошибок по именам.
+    """
+    compiled, errors = [], {}
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        for name in template_names(engine):
+            try:
+                template = engine.get_template(name)
+                for reference in referenced_names(template):
+                    engine.get_template(reference)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                errors[name] = error
+            else:
+                compiled.append(name)
+    return compiled, errors
+
+
+def warm_up():
+    """
+    Разбираем шаблоны при старте процесса, а не на первом запросе.
+
+    Вызывается из wsgi.py и asgi.py; ошибки шаблонов пишем в лог.
+    """
+    for name, error in compile_templates()[1].items():
+        logger.error('Шаблон %s не разобран: %s', name, error)